@@ -3,41 +3,231 @@ Client Server for Debug Duck (Laptop)
 Flask server that handles help requests from the Raspberry Pi
 """
 
-from flask import Flask, request, jsonify
+from config import CONFIG
+
+# Optional gevent mode: must patch sockets before anything imports them
+USE_GEVENT = CONFIG.use_gevent
+if USE_GEVENT:
+    try:
+        from gevent import monkey
+        monkey.patch_all()
+    except ImportError:
+        print("WARNING: USE_GEVENT set but gevent is not installed")
+        USE_GEVENT = False
+
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import JSONProvider
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import queue
+import threading
 import requests
-from llm_router import LLMRouter
+from requests.adapters import HTTPAdapter
+from llm_router import LLMRouter, BatchingLLMRouter
 import ocr_service
 import pyttsx3
-import os
 
-# Initialize TTS engine for laptop
+# orjson is optional; fall back to Flask's stdlib json provider without it
 try:
-    tts_engine = pyttsx3.init()
-    tts_engine.setProperty('rate', 150)  # Speed of speech
-    tts_engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
-    print("TTS engine initialized for laptop speakers")
-except Exception as e:
-    print(f"WARNING: Could not initialize TTS: {e}")
-    tts_engine = None
+    import orjson
+except ImportError:
+    orjson = None
+
+# Laptop TTS runs on its own worker thread so handlers never block on speech.
+# The pyttsx3 engine is created on that thread (some drivers are bound to the
+# thread that initialised them).
+TTS_QUEUE_SIZE = 32
+tts_engine = None
+_tts_queue = queue.Queue(maxsize=TTS_QUEUE_SIZE)
+_tts_ready = threading.Event()
+_tts_start_lock = threading.Lock()
+_tts_started = False
+
+
+def _tts_worker():
+    """Initialise the TTS engine, then speak queued text forever"""
+    global tts_engine
+    try:
+        tts_engine = pyttsx3.init()
+        tts_engine.setProperty('rate', 150)  # Speed of speech
+        tts_engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
+        print("TTS engine initialized for laptop speakers")
+    except Exception as e:
+        print(f"WARNING: Could not initialize TTS: {e}")
+        tts_engine = None
+    finally:
+        _tts_ready.set()
+
+    if not tts_engine:
+        return
+
+    while True:
+        text = _tts_queue.get()
+        try:
+            tts_engine.say(text)
+            tts_engine.runAndWait()
+        except Exception as e:
+            print(f"ERROR speaking: {e}")
+
+
+def _ensure_tts_worker():
+    """Start the TTS worker thread once, on first use"""
+    global _tts_started
+    with _tts_start_lock:
+        if not _tts_started:
+            threading.Thread(target=_tts_worker, daemon=True).start()
+            _tts_started = True
+
 
 # Configuration - set to True to speak on laptop instead of Pi
-SPEAK_ON_LAPTOP = os.environ.get("SPEAK_ON_LAPTOP", "true").lower() == "true"
+SPEAK_ON_LAPTOP = CONFIG.speak_on_laptop
+
+# Set LLM_BATCHING=true to send OpenRouter calls through a bounded
+# concurrent dispatcher (caps how many are in flight; each is still its own request)
+LLM_BATCHING = CONFIG.llm_batching
+
+# Set FLASK_DEBUG=true to run the Werkzeug debug server instead of waitress
+FLASK_DEBUG = CONFIG.flask_debug
+
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 # Flask app setup
 app = Flask(__name__)
+if orjson:
+    app.json = ORJSONProvider(app)
+
+
+def _prebuilt_json(payload):
+    """Encode a constant JSON response body once at import time"""
+    return app.json.dumps(payload).encode("utf-8")
+
+
+def _json_bytes_response(body, status):
+    """Return a pre-encoded JSON body without re-serialising it"""
+    return Response(body, status=status, mimetype="application/json")
+
+
+@functools.lru_cache(maxsize=1)
+def get_router():
+    """
+    Create the LLM router on first use and reuse it afterwards.
+
+    Returns:
+        LLMRouter: The shared router, or None if it failed to initialize
+    """
+    try:
+        router = BatchingLLMRouter() if LLM_BATCHING else LLMRouter()
+        print(f"{type(router).__name__} initialized successfully")
+        return router
+    except Exception as e:
+        print(f"ERROR: Failed to initialize LLMRouter: {e}")
+        return None
 
-# Initialize the LLM router
-try:
-    llm_router = LLMRouter()
-    print("LLMRouter initialized successfully")
-except Exception as e:
-    print(f"ERROR: Failed to initialize LLMRouter: {e}")
-    llm_router = None
 
 # Configuration
 PI_URL = "http://10.249.14.247:5000/speak"
+PI_CONNECT_TIMEOUT = 5
+PI_READ_TIMEOUT = 35
 LAPTOP_PORT = 5001
 
+# Shared HTTP session for the Pi so repeated /speak calls reuse the
+# keep-alive connection instead of reconnecting every time
+_pi_session = requests.Session()
+_pi_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_pi_session.headers.update({"Connection": "keep-alive"})
+
+# Worker pool for overlapping blocking I/O (OCR, network) within a request
+executor = ThreadPoolExecutor(max_workers=4)
+
+# Pi sends get their own pool: each can block for the full connect+read
+# timeout when the Pi is slow or unreachable, and mustn't hold up OCR
+pi_executor = ThreadPoolExecutor(max_workers=2)
+
+# Last screenshot hash and the answer given for it; an identical screen on
+# the next press skips both OCR and the LLM call
+_last_frame_hash = None
+_last_answer = None
+_frame_cache_lock = threading.Lock()
+
+# Spoken error responses
+SAY_OCR_EMPTY = "I couldn't read your screen. Make sure there's code visible."
+SAY_CAPTURE_FAILED = "I couldn't capture your screen. Something went wrong."
+SAY_NO_CODE = "I don't see any code on your screen. Can you make sure your code editor is visible?"
+SAY_NO_ROUTER = "My AI brain isn't working. Check the API key."
+SAY_NO_QUESTION = "I didn't hear a question. Try again?"
+
+# OCR failure kinds: (HTTP status, spoken response, message)
+# A message of None means the OCR error text itself is reported
+_OCR_ERRORS = {
+    "empty": (500, SAY_OCR_EMPTY, "OCR returned empty result"),
+    "capture_fail": (500, SAY_CAPTURE_FAILED, None),
+    "no_code": (400, SAY_NO_CODE, "No text found on screen"),
+}
+
+# Pre-encoded bodies for the fixed error responses
+_OCR_ERROR_BODIES = {}
+for _kind, (_status, _say, _message) in _OCR_ERRORS.items():
+    if _message is not None:
+        _OCR_ERROR_BODIES[_kind, True] = _prebuilt_json(
+            {"status": "error", "message": _message, "response": _say})
+        _OCR_ERROR_BODIES[_kind, False] = _prebuilt_json(
+            {"status": "error", "message": _message})
+ERR_HELP_NO_ROUTER = _prebuilt_json({
+    "status": "error",
+    "message": "LLMRouter not initialized",
+    "response": SAY_NO_ROUTER
+})
+ERR_NO_ROUTER = _prebuilt_json({"status": "error", "message": "LLMRouter not initialized"})
+ERR_NO_QUESTION = _prebuilt_json({"status": "error", "message": "No question provided"})
+
+
+def _classify_ocr(code_text):
+    """
+    Classify an OCR result.
+
+    Returns:
+        str: A key into _OCR_ERRORS, or None if the text is usable code
+    """
+    if not code_text:
+        return "empty"
+    if code_text.startswith("Could not capture screen"):
+        return "capture_fail"
+    if code_text == "No code detected":
+        return "no_code"
+    return None
+
+
+def _reply_ocr_error(kind, code_text, include_response):
+    """
+    Tell the duck to speak the error for an OCR failure and build the
+    HTTP error response.
+
+    Args:
+        kind (str): Key into _OCR_ERRORS
+        code_text (str): The OCR result (reported for capture failures)
+        include_response (bool): Whether to include the spoken text in the body
+    """
+    status, say, message = _OCR_ERRORS[kind]
+    send_to_pi_async(say)
+
+    body = _OCR_ERROR_BODIES.get((kind, include_response))
+    if body is not None:
+        return _json_bytes_response(body, status)
+
+    payload = {"status": "error", "message": message or code_text}
+    if include_response:
+        payload["response"] = say
+    return jsonify(payload), status
+
 
 @app.route('/get-help', methods=['GET', 'POST'])
 def get_help():
@@ -53,66 +243,83 @@ def get_help():
     print("HELP REQUEST RECEIVED from Pi")
     print("=" * 50)
 
+    global _last_frame_hash, _last_answer
+
+    # Prime the OpenRouter and Pi connections while OCR runs
+    warm_connections()
+
     try:
         # Step 1: Capture screenshot and extract code
         print("Step 1: Capturing screenshot and running OCR...")
-        code_text = ocr_service.capture_and_ocr()
+        img, capture_error = ocr_service.capture_screen()
+        frame_hash = None
+
+        if img is None:
+            code_text = capture_error
+        else:
+            # Short-circuit if the screen is identical to the last request
+            frame_hash = ocr_service.frame_hash(img)
+            with _frame_cache_lock:
+                cached_answer = _last_answer if frame_hash == _last_frame_hash else None
+
+            if cached_answer:
+                print("Screen unchanged since last request, reusing previous answer")
+                if SPEAK_ON_LAPTOP:
+                    speak_local(cached_answer)
+                    speak_status = "spoken_on_laptop"
+                else:
+                    send_to_pi_async(cached_answer)
+                    speak_status = "sent_to_pi"
+                return jsonify({
+                    "status": "success",
+                    "cached": True,
+                    "response": cached_answer,
+                    "speak_status": speak_status
+                }), 200
+
+            code_text = ocr_service.ocr_image(img, frame_key=frame_hash)
 
         # Check for OCR errors
-        if not code_text:
-            error_response = "I couldn't read your screen. Make sure there's code visible."
-            send_to_pi(error_response)
-            return jsonify({
-                "status": "error",
-                "message": "OCR returned empty result",
-                "response": error_response
-            }), 500
-
-        if code_text.startswith("Could not capture screen"):
-            error_response = "I couldn't capture your screen. Something went wrong."
-            send_to_pi(error_response)
-            return jsonify({
-                "status": "error",
-                "message": code_text,
-                "response": error_response
-            }), 500
-
-        if code_text == "No code detected":
-            error_response = "I don't see any code on your screen. Can you make sure your code editor is visible?"
-            send_to_pi(error_response)
-            return jsonify({
-                "status": "error",
-                "message": "No text found on screen",
-                "response": error_response
-            }), 400
+        ocr_error = _classify_ocr(code_text)
+        if ocr_error:
+            return _reply_ocr_error(ocr_error, code_text, include_response=True)
 
         print(f"OCR extracted {len(code_text)} characters")
         print(f"First 200 chars: {code_text[:200]}...")
 
         # Step 2: Get coding help from LLM
+        llm_router = get_router()
         if not llm_router:
-            error_response = "My AI brain isn't working. Check the API key."
-            send_to_pi(error_response)
-            return jsonify({
-                "status": "error",
-                "message": "LLMRouter not initialized",
-                "response": error_response
-            }), 500
+            send_to_pi_async(SAY_NO_ROUTER)
+            return _json_bytes_response(ERR_HELP_NO_ROUTER, 500)
 
         print("Step 2: Getting coding help from LLM...")
-        answer = llm_router.get_coding_help(code_text)
-        print(f"LLM response: {answer}")
-
-        # Step 3: Speak the answer
-        print("Step 3: Speaking response...")
         if SPEAK_ON_LAPTOP:
-            # Speak on laptop speakers
-            speak_local(answer)
+            # Step 3 (pipelined): speak each sentence on the laptop speakers
+            # as soon as the model streams it
+            print("Step 3: Speaking response as it streams...")
+            sentences = []
+            for sentence in llm_router.stream_coding_help(code_text):
+                sentences.append(sentence)
+                speak_local(sentence)
+            answer = " ".join(sentences)
+            print(f"LLM response: {answer}")
             speak_status = "spoken_on_laptop"
         else:
-            # Send to Pi to speak
-            pi_response = send_to_pi(answer)
-            speak_status = "sent_to_pi" if pi_response else "failed"
+            answer = llm_router.get_coding_help(code_text)
+            print(f"LLM response: {answer}")
+
+            # Step 3: Speak the answer
+            print("Step 3: Speaking response...")
+            # Send to Pi to speak in the background; the Pi doesn't need our
+            # HTTP response before it starts talking
+            send_to_pi_async(answer)
+            speak_status = "sent_to_pi"
+
+        if frame_hash is not None:
+            with _frame_cache_lock:
+                _last_frame_hash = frame_hash
+                _last_answer = answer
 
         print(f"SUCCESS: Response {speak_status}")
         return jsonify({
@@ -126,7 +333,7 @@ def get_help():
         error_msg = f"Error processing help request: {str(e)}"
         print(f"ERROR: {error_msg}")
         fallback_response = "Oops, something went wrong on my end. Try again?"
-        send_to_pi(fallback_response)
+        send_to_pi_async(fallback_response)
         return jsonify({
             "status": "error",
             "message": error_msg,
@@ -154,60 +361,40 @@ def get_contextual_help():
         user_question = data.get('question', '')
 
         if not user_question:
-            error_response = "I didn't hear a question. Try again?"
-            send_to_pi(error_response)
-            return jsonify({
-                "status": "error",
-                "message": "No question provided"
-            }), 400
+            send_to_pi_async(SAY_NO_QUESTION)
+            return _json_bytes_response(ERR_NO_QUESTION, 400)
 
         print(f"User question: {user_question}")
 
-        # Step 1: Capture screenshot and extract code
+        # Prime the OpenRouter and Pi connections while OCR runs
+        warm_connections()
+
+        # Step 1: Capture screenshot and extract code in the background
+        # while we finish preparing the request
         print("Step 1: Capturing screenshot and running OCR...")
-        code_text = ocr_service.capture_and_ocr()
+        ocr_future = executor.submit(ocr_service.capture_and_ocr)
+
+        llm_router = get_router()
+        if not llm_router:
+            ocr_future.cancel()
+            send_to_pi_async(SAY_NO_ROUTER)
+            return _json_bytes_response(ERR_NO_ROUTER, 500)
+
+        code_text = ocr_future.result()
 
         # Check for OCR errors
-        if not code_text:
-            error_response = "I couldn't read your screen. Make sure there's code visible."
-            send_to_pi(error_response)
-            return jsonify({
-                "status": "error",
-                "message": "OCR returned empty result"
-            }), 500
-
-        if code_text.startswith("Could not capture screen"):
-            error_response = "I couldn't capture your screen. Something went wrong."
-            send_to_pi(error_response)
-            return jsonify({
-                "status": "error",
-                "message": code_text
-            }), 500
-
-        if code_text == "No code detected":
-            error_response = "I don't see any code on your screen. Can you make sure your code editor is visible?"
-            send_to_pi(error_response)
-            return jsonify({
-                "status": "error",
-                "message": "No text found on screen"
-            }), 400
+        ocr_error = _classify_ocr(code_text)
+        if ocr_error:
+            return _reply_ocr_error(ocr_error, code_text, include_response=False)
 
         # Step 2: Get contextual help from LLM
-        if not llm_router:
-            error_response = "My AI brain isn't working. Check the API key."
-            send_to_pi(error_response)
-            return jsonify({
-                "status": "error",
-                "message": "LLMRouter not initialized"
-            }), 500
-
         print("Step 2: Getting contextual help from LLM...")
         answer = llm_router.get_contextual_help(code_text, user_question)
         print(f"LLM response: {answer}")
 
-        # Step 3: Send answer to Pi
+        # Step 3: Send answer to Pi (in the background)
         print("Step 3: Sending response to Pi...")
-        send_to_pi(answer)
+        send_to_pi_async(answer)
 
         return jsonify({
             "status": "success",
@@ -233,32 +420,81 @@ def status():
         "status": "running",
         "service": "Debug Duck Laptop Client",
         "port": LAPTOP_PORT,
-        "llm_router": "initialized" if llm_router else "failed"
+        "llm_router": "initialized" if get_router() else "failed"
     }), 200
 
 
+@app.route('/reset', methods=['POST'])
+def reset():
+    """
+    Clear cached LLM answers and per-segment analyses
+    """
+    llm_router = get_router()
+    if not llm_router:
+        return _json_bytes_response(ERR_NO_ROUTER, 500)
+
+    llm_router.clear_caches()
+    print("LLM caches cleared")
+    return jsonify({"status": "success"}), 200
+
+
 def speak_local(text):
     """
-    Speak text on laptop speakers using pyttsx3
+    Queue text to be spoken on laptop speakers using pyttsx3.
+    Returns immediately; the TTS worker thread does the speaking.
 
     Args:
         text (str): Text to speak
 
     Returns:
-        bool: True if successful, False otherwise
+        bool: True if queued, False if TTS is unavailable
     """
+    _ensure_tts_worker()
+    _tts_ready.wait(timeout=5)
     if not tts_engine:
         print("ERROR: TTS engine not initialized")
         return False
 
+    print(f"Speaking on laptop: '{text[:50]}...'")
+    while True:
+        try:
+            _tts_queue.put_nowait(text)
+            return True
+        except queue.Full:
+            # Drop the oldest pending message if the user spams the button
+            try:
+                _tts_queue.get_nowait()
+            except queue.Empty:
+                pass
+
+
+def _warm_pi_connection():
+    """Open the keep-alive connection to the Pi; the response is ignored"""
     try:
-        print(f"Speaking on laptop: '{text[:50]}...'")
-        tts_engine.say(text)
-        tts_engine.runAndWait()
-        return True
-    except Exception as e:
-        print(f"ERROR speaking: {e}")
-        return False
+        _pi_session.head(PI_URL, timeout=0.5)
+    except Exception:
+        pass
+
+
+def warm_connections():
+    """
+    Start priming the OpenRouter and Pi connection pools in the background
+    so later requests skip the connection handshake
+    """
+    llm_router = get_router()
+    if llm_router:
+        executor.submit(llm_router.warm_up)
+    pi_executor.submit(_warm_pi_connection)
+
+
+def send_to_pi_async(text):
+    """
+    Sends text to the Pi on the Pi pool without waiting for the result.
+
+    Returns:
+        concurrent.futures.Future: Resolves to send_to_pi's return value
+    """
+    return pi_executor.submit(send_to_pi, text)
 
 
 def send_to_pi(text):
@@ -272,10 +508,12 @@ def send_to_pi(text):
         bool: True if successful, False otherwise
     """
     try:
-        response = requests.post(
+        response = _pi_session.post(
             PI_URL,
             json={"text": text},
-            timeout=35  # Increased to allow for TTS generation and playback
+            # Fail fast if the Pi is unreachable; the read timeout still
+            # allows for TTS generation and playback on the Pi
+            timeout=(PI_CONNECT_TIMEOUT, PI_READ_TIMEOUT)
         )
         if response.status_code == 200:
             print(f"Successfully sent to Pi: '{text[:50]}...'")
@@ -303,9 +541,35 @@ if __name__ == "__main__":
     print(f"Pi URL configured as: {PI_URL}")
     print("=" * 60 + "\n")
 
-    # Run the Flask app
-    app.run(
-        host='0.0.0.0',  # Listen on all network interfaces
-        port=LAPTOP_PORT,
-        debug=True
-    )
+    # Warm up the router and TTS engine before the first request arrives
+    get_router()
+    _ensure_tts_worker()
+
+    if FLASK_DEBUG:
+        # Development server with the debugger; the reloader stays off so the
+        # router and TTS engine are not initialised twice
+        app.run(
+            host='0.0.0.0',  # Listen on all network interfaces
+            port=LAPTOP_PORT,
+            debug=True,
+            use_reloader=False
+        )
+    elif USE_GEVENT:
+        # Cooperative server: requests waiting on OCR/OpenRouter/Pi I/O yield
+        # to each other instead of each holding a worker thread
+        from gevent.pywsgi import WSGIServer
+        print("Serving with gevent WSGIServer")
+        WSGIServer(('0.0.0.0', LAPTOP_PORT), app).serve_forever()
+    else:
+        try:
+            from waitress import serve
+            print("Serving with waitress")
+            serve(app, host='0.0.0.0', port=LAPTOP_PORT, threads=8)
+        except ImportError:
+            print("WARNING: waitress not installed, using Flask's built-in server")
+            app.run(
+                host='0.0.0.0',  # Listen on all network interfaces
+                port=LAPTOP_PORT,
+                debug=False,
+                threaded=True
+            )
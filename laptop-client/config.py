@@ -0,0 +1,67 @@
+"""
+Configuration for Debug Duck (Laptop)
+Reads the .env file and environment variables once at import
+"""
+
+import os
+from dataclasses import dataclass
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+
+def _env_bool(name, default):
+    """Parse a true/false environment variable"""
+    return os.environ.get(name, default).lower() == "true"
+
+
+@dataclass(frozen=True)
+class Config:
+    """
+    Laptop client settings, resolved once at startup
+    """
+
+    # OpenRouter
+    openrouter_api_key: str
+
+    # Server
+    speak_on_laptop: bool
+    use_gevent: bool
+    flask_debug: bool
+
+    # LLM router
+    llm_batching: bool
+    llm_batch_max: int
+    llm_batch_wait_timeout_s: float
+    llm_cache_size: int
+    llm_cache_ttl: float
+    llm_confidence_threshold: int
+    llm_segment_analysis: bool
+    llm_max_code_chars: int
+
+    # OCR
+    ocr_cache_size: int
+    ocr_tiles: int
+    ocr_workers: int
+    ocr_active_window: bool
+
+
+CONFIG = Config(
+    openrouter_api_key=os.environ.get("OPENROUTER_API_KEY"),
+    speak_on_laptop=_env_bool("SPEAK_ON_LAPTOP", "true"),
+    use_gevent=_env_bool("USE_GEVENT", "false"),
+    flask_debug=_env_bool("FLASK_DEBUG", "false"),
+    llm_batching=_env_bool("LLM_BATCHING", "false"),
+    llm_batch_max=int(os.environ.get("LLM_BATCH_MAX", 8)),
+    llm_batch_wait_timeout_s=float(os.environ.get("LLM_BATCH_WAIT_TIMEOUT_S", 0.05)),
+    llm_cache_size=int(os.environ.get("LLM_CACHE_SIZE", 256)),
+    llm_cache_ttl=float(os.environ.get("LLM_CACHE_TTL", 300)),
+    llm_confidence_threshold=int(os.environ.get("LLM_CONFIDENCE_THRESHOLD", 7)),
+    llm_segment_analysis=_env_bool("LLM_SEGMENT_ANALYSIS", "false"),
+    llm_max_code_chars=int(os.environ.get("LLM_MAX_CODE_CHARS", 4000)),
+    ocr_cache_size=int(os.environ.get("OCR_CACHE_SIZE", 32)),
+    ocr_tiles=max(1, int(os.environ.get("OCR_TILES", 8))),
+    ocr_workers=max(1, int(os.environ.get("OCR_WORKERS", min(4, os.cpu_count() or 1)))),
+    ocr_active_window=_env_bool("OCR_ACTIVE_WINDOW", "true"),
+)
@@ -5,26 +5,233 @@ Uses OpenRouter to access multiple AI models for different tasks
 
 import requests
 import os
-from dotenv import load_dotenv
+import re
+import json
+import time
+import random
+import hashlib
+import contextlib
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from collections import OrderedDict, deque
+from config import CONFIG
 
-# Load environment variables from .env file
-load_dotenv()
+# httpx is optional; with it (and h2) OpenRouter calls share one multiplexed
+# HTTP/2 connection, otherwise they go through a requests.Session
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
-# Get API key from environment
-OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY")
+# Get API key from config
+OPENROUTER_API_KEY = CONFIG.openrouter_api_key
 
 # OpenRouter API endpoint
 OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_BASE_URL = "https://openrouter.ai"
 
 # Your app URL for OpenRouter identification
 YOUR_APP_URL = "http://github.com/debug-duck/laptop-client"
 
+# Dispatch knobs for BatchingLLMRouter
+BATCH_MAX = CONFIG.llm_batch_max
+BATCH_WAIT_TIMEOUT_S = CONFIG.llm_batch_wait_timeout_s
+# A queued call is given up (returning None) after this long; the request
+# itself times out at 30 s, so this only fires if the dispatcher is stuck
+BATCH_CALL_TIMEOUT_S = 45
+
+# Pregenerated comforting phrases served without an LLM round-trip
+COMFORTING_PHRASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                       "comforting_phrases.json")
+# get_comforting_phrase(refresh=True) adds to the pool up to this size
+PHRASE_POOL_MAX = 100
+DEFAULT_COMFORTING_PHRASE = "You've got this. I believe in you!"
+
+# Response cache settings (re-pressing the button on an unchanged screen
+# produces byte-identical OCR text, so the answer can be reused)
+RESPONSE_CACHE_SIZE = CONFIG.llm_cache_size
+RESPONSE_CACHE_TTL = CONFIG.llm_cache_ttl
+
+
+class ResponseCache:
+    """
+    Small thread-safe LRU cache with per-entry expiry
+    """
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing/expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.monotonic() > expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entry"""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SegmentCache(ResponseCache):
+    """
+    Per-segment analysis cache keyed on the hash of each code segment, so
+    only the parts of the screen that changed get re-analyzed
+    """
+
+    def get_segment(self, segment_text):
+        return self.get(_hash_text(segment_text))
+
+    def set_segment(self, segment_text, analysis):
+        self.set(_hash_text(segment_text), analysis)
+
+
+# Split on blank lines or at the start of a top-level definition
+SEGMENT_SPLIT_PATTERN = re.compile(r"\n\s*\n|\n(?=(?:def |class |function ))")
+
+# Model cascade: try the fast model first and only escalate to the strong
+# model when the fast model reports low confidence
+FAST_MODEL = "deepseek/deepseek-chat"
+STRONG_MODEL = "anthropic/claude-3.5-sonnet"
+CONFIDENCE_THRESHOLD = CONFIG.llm_confidence_threshold
+CONFIDENCE_PATTERN = re.compile(r"\s*CONFIDENCE:\s*(\d+)\s*$", re.IGNORECASE)
+
+# Set LLM_SEGMENT_ANALYSIS=true to analyze code segment-by-segment
+SEGMENT_ANALYSIS = CONFIG.llm_segment_analysis
+SEGMENT_MODEL = FAST_MODEL
+# Segments that aren't cached are analyzed this many at a time, so a cold
+# screen costs about two round-trips (analysis, then merge) rather than N+1
+SEGMENT_WORKERS = 4
+
+
+def _split_segments(code_text):
+    """Split OCR'd code into logical blocks (functions/classes/paragraphs)"""
+    return [seg.strip() for seg in SEGMENT_SPLIT_PATTERN.split(code_text) if seg.strip()]
+
+
+# Sentence boundary used to hand streamed text to TTS as early as possible
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+# OCR cleanup before the code is sent to the LLM
+LINE_NUMBER_PATTERN = re.compile(r"^[ \t]*(\d+)(?:[ \t]*[:|])?(?:[ \t]|$)")
+# Share of non-blank lines that must be numbered to count as a gutter
+GUTTER_MIN_FRACTION = 0.6
+BLANK_LINES_PATTERN = re.compile(r"\n[ \t]*(?:\n[ \t]*){2,}")
+MAX_CODE_CHARS = CONFIG.llm_max_code_chars
+
+
+def _strip_line_numbers(code_text):
+    """
+    Remove an editor's line-number gutter, if the text has one: most lines
+    start with a number and the numbers count up. A number at the start of
+    the odd line (a continued expression, a list of values) is left alone.
+    """
+    lines = code_text.split("\n")
+    matches = [LINE_NUMBER_PATTERN.match(line) for line in lines]
+    numbers = [int(match.group(1)) for match in matches if match]
+    nonblank = sum(1 for line in lines if line.strip())
+    if len(numbers) < 3 or len(numbers) < nonblank * GUTTER_MIN_FRACTION:
+        return code_text
+    if any(later <= earlier for earlier, later in zip(numbers, numbers[1:])):
+        return code_text
+    return "\n".join(line[match.end():] if match else line for line, match in zip(lines, matches))
+
+
+def _preprocess_code(code_text):
+    """
+    Trim OCR'd code to cut prompt tokens: strip editor line numbers,
+    collapse runs of blank lines and keep only the last MAX_CODE_CHARS.
+    """
+    text = _strip_line_numbers(code_text)
+    text = BLANK_LINES_PATTERN.sub("\n\n", text).strip()
+    if len(text) > MAX_CODE_CHARS:
+        text = text[-MAX_CODE_CHARS:]
+    return text
+
+
+# System prompts and user templates (constant, built once at import)
+_SYS_COMFORT = {
+    "role": "system",
+    "content": ("You are an empathetic, cute, and slightly quirky Debug Duck. "
+                "A developer is visibly frustrated with their code. "
+                "Your job is to proactively say one short, comforting, "
+                "or funny distracting sentence (less than 15 words) "
+                "to help them reset. DO NOT offer coding help. "
+                "Just be a friend.")
+}
+_USER_COMFORT = {"role": "user", "content": "Get me a comforting phrase for a frustrated developer."}
+
+_SYS_CODING = {
+    "role": "system",
+    "content": ("You are an expert AI Debug Duck. You are helping a developer. "
+                "You will be given a block of code from their screen. "
+                "Concisely (in 2-3 sentences) identify the most likely bug "
+                "and suggest a fix. Speak in a helpful, friendly tone.")
+}
+_SYS_CODING_PROBE = {
+    "role": "system",
+    "content": _SYS_CODING["content"] + (
+        " After your answer, on a new line, rate how confident you are "
+        "that you found the real bug as: CONFIDENCE: <0-10>")
+}
+_USER_TEMPLATE_CODING = "Here is the code I'm looking at:\n\n{code}"
+
+_SYS_CONTEXT = {
+    "role": "system",
+    "content": ("You are an expert AI Debug Duck. You are helping a developer. "
+                "You will be given their spoken question AND the code on their screen. "
+                "Directly answer their question, using the code for context. "
+                "Be concise, helpful, and friendly. Speak as a companion.")
+}
+_USER_TEMPLATE_CONTEXT = "My question is: '{question}'\n\nHere is the code on my screen:\n{code}"
+
+_SYS_SEGMENT = {
+    "role": "system",
+    "content": ("You are reviewing one fragment of a developer's code. "
+                "In one short sentence, name the most likely bug in it. "
+                "If it looks fine, reply with exactly: OK")
+}
+_SYS_SEGMENT_MERGE = {
+    "role": "system",
+    "content": ("You are an expert AI Debug Duck. You are helping a developer. "
+                "You will be given review notes on parts of their code. "
+                "Concisely (in 2-3 sentences) identify the most likely bug "
+                "and suggest a fix. Speak in a helpful, friendly tone.")
+}
+
+
+def _hash_text(text):
+    """Content hash used as a cache key for OCR'd code"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 
 class LLMRouter:
     """
     Routes requests to appropriate LLM models via OpenRouter
     """
 
+    __slots__ = ("api_key", "headers", "session", "client",
+                 "response_cache", "segment_cache", "_phrases")
+
     def __init__(self):
         if not OPENROUTER_API_KEY:
             raise ValueError("OPENROUTER_API_KEY not set in environment variables.")
@@ -36,13 +243,59 @@ class LLMRouter:
             "Content-Type": "application/json"
         }
 
+        # Reuse one keep-alive connection to OpenRouter instead of paying a
+        # fresh TCP + TLS handshake on every request
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.client = self._create_http2_client()
+
+        # Cache of LLM answers keyed by a hash of the prompt inputs
+        self.response_cache = ResponseCache()
+        self.segment_cache = SegmentCache()
+
+        # Precomputed comforting phrases (refreshed from the LLM on demand);
+        # once full, each new phrase replaces the oldest
+        phrases = self._load_phrases()
+        self._phrases = deque(phrases, maxlen=max(len(phrases), PHRASE_POOL_MAX))
+
+    def _create_http2_client(self):
+        """
+        Create an httpx client that multiplexes requests over one HTTP/2
+        connection. Returns None if httpx or its h2 extra is unavailable.
+        """
+        if httpx is None:
+            return None
+        try:
+            return httpx.Client(
+                http2=True,
+                headers=self.headers,
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=8, max_connections=16)
+            )
+        except ImportError:
+            print("httpx installed without HTTP/2 support, using requests")
+            return None
+
+    def warm_up(self):
+        """
+        Prime the connection pool with a cheap HEAD request so the next real
+        call skips the TCP + TLS handshake. Errors are ignored.
+        """
+        try:
+            if self.client:
+                self.client.head(OPENROUTER_BASE_URL, timeout=0.5)
+            else:
+                self.session.head(OPENROUTER_BASE_URL, timeout=0.5)
+        except Exception:
+            pass
+
     def _call_openrouter(self, model, messages, max_tokens=150, temperature=0.3):
         """
         Internal method to call OpenRouter API
 
         Args:
             model (str): The model identifier (e.g., "anthropic/claude-3.5-sonnet")
-            messages (list): List of message dictionaries
+            messages (list or tuple): Message dictionaries
             max_tokens (int): Maximum tokens in response
             temperature (float): Temperature for response generation
 
@@ -57,12 +310,14 @@ class LLMRouter:
                 "temperature": temperature
             }
 
-            response = requests.post(
-                OPENROUTER_API_URL,
-                headers=self.headers,
-                json=payload,
-                timeout=30
-            )
+            if self.client:
+                response = self.client.post(OPENROUTER_API_URL, json=payload)
+            else:
+                response = self.session.post(
+                    OPENROUTER_API_URL,
+                    json=payload,
+                    timeout=30
+                )
 
             if response.status_code == 200:
                 data = response.json()
@@ -76,64 +331,318 @@ class LLMRouter:
             print("OpenRouter API request timed out")
             return None
         except Exception as e:
-            print(f"Error calling OpenRouter: {e}")
+            if httpx is not None and isinstance(e, httpx.TimeoutException):
+                print("OpenRouter API request timed out")
+            else:
+                print(f"Error calling OpenRouter: {e}")
             return None
 
-    def get_comforting_phrase(self):
+    @contextlib.contextmanager
+    def _open_stream(self, payload):
+        """Open a streaming POST to OpenRouter and yield an iterator over its lines"""
+        if self.client:
+            with self.client.stream("POST", OPENROUTER_API_URL, json=payload) as response:
+                if response.status_code != 200:
+                    response.read()
+                    raise requests.exceptions.HTTPError(
+                        f"OpenRouter API error: {response.status_code} - {response.text}"
+                    )
+                yield response.iter_lines()
+        else:
+            with self.session.post(OPENROUTER_API_URL, json=payload, timeout=30, stream=True) as response:
+                if response.status_code != 200:
+                    raise requests.exceptions.HTTPError(
+                        f"OpenRouter API error: {response.status_code} - {response.text}"
+                    )
+                # SSE is always UTF-8, but with no charset in the header
+                # requests would decode it as ISO-8859-1
+                response.encoding = "utf-8"
+                yield response.iter_lines(decode_unicode=True)
+
+    def _stream_openrouter(self, model, messages, max_tokens=150, temperature=0.3):
         """
-        Phase 1: Calls a creative/roleplay model for an empathetic phrase.
+        Call OpenRouter with SSE streaming and yield complete sentences as
+        soon as they arrive.
+
+        Args:
+            model (str): The model identifier
+            messages (list or tuple): Message dictionaries
+            max_tokens (int): Maximum tokens in response
+            temperature (float): Temperature for response generation
+
+        Yields:
+            str: Each sentence of the response, in order
+
+        Raises:
+            Exception: If the request fails (requests or httpx error)
+        """
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+
+        with self._open_stream(payload) as lines:
+            buffer = ""
+            for line in lines:
+                # SSE frames look like "data: {...}"; skip keep-alive comments
+                if not line or not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    break
+
+                delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+                if not delta:
+                    continue
+
+                buffer += delta
+                sentences = SENTENCE_END_PATTERN.split(buffer)
+                for sentence in sentences[:-1]:
+                    yield sentence
+                buffer = sentences[-1]
+
+            if buffer.strip():
+                yield buffer.strip()
+
+    def clear_caches(self):
+        """Drop all cached answers and segment analyses"""
+        self.response_cache.clear()
+        self.segment_cache.clear()
+
+    def _analyze_segment(self, segment):
+        """Return a short bug note for one code segment, using the segment cache"""
+        cached = self.segment_cache.get_segment(segment)
+        if cached:
+            return cached
+
+        messages = (_SYS_SEGMENT, {"role": "user", "content": segment})
+
+        analysis = self._call_openrouter(
+            model=SEGMENT_MODEL,
+            messages=messages,
+            max_tokens=60,
+            temperature=0.2
+        )
+
+        if analysis:
+            self.segment_cache.set_segment(segment, analysis)
+        return analysis
+
+    def _get_segmented_coding_help(self, code_text):
+        """
+        Analyze each code segment separately (re-using cached analyses for
+        unchanged segments) and merge the notes into one short answer.
+
+        Returns:
+            str: The merged answer, or None on error
+        """
+        segments = _split_segments(code_text)
+        analyses = [self.segment_cache.get_segment(segment) for segment in segments]
+        missing = [i for i, analysis in enumerate(analyses) if not analysis]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(len(missing), SEGMENT_WORKERS)) as pool:
+                fetched = pool.map(self._analyze_segment, [segments[i] for i in missing])
+                for i, analysis in zip(missing, fetched):
+                    analyses[i] = analysis
+
+        notes = []
+        for analysis in analyses:
+            if analysis is None:
+                return None
+            if analysis.strip().upper().rstrip(".") != "OK":
+                notes.append(f"- {analysis.strip()}")
+
+        if not notes:
+            return "I read through your code and nothing jumps out as a bug. Nice work!"
+
+        print(f"Segment analysis: {len(notes)}/{len(segments)} segments flagged")
+
+        messages = (
+            _SYS_SEGMENT_MERGE,
+            {"role": "user", "content": "Review notes:\n" + "\n".join(notes)}
+        )
+
+        return self._call_openrouter(
+            model=SEGMENT_MODEL,
+            messages=messages,
+            max_tokens=150,
+            temperature=0.3
+        )
+
+    def _load_phrases(self):
+        """Load the pregenerated comforting phrases, falling back to a default"""
+        try:
+            with open(COMFORTING_PHRASES_PATH, encoding="utf-8") as f:
+                phrases = [p for p in json.load(f) if p]
+            if phrases:
+                return phrases
+        except Exception as e:
+            print(f"Could not load comforting phrases: {e}")
+        return [DEFAULT_COMFORTING_PHRASE]
+
+    def get_comforting_phrase(self, refresh=False):
+        """
+        Phase 1: Returns an empathetic phrase from the precomputed pool.
+        Pass refresh=True to generate a new one with a creative/roleplay
+        model and add it to the pool.
         This runs on the Pi's server.
         """
-        print("Getting comforting phrase...")
+        if not refresh:
+            return random.choice(self._phrases)
 
-        messages = [
-            {
-                "role": "system",
-                "content": ("You are an empathetic, cute, and slightly quirky Debug Duck. "
-                            "A developer is visibly frustrated with their code. "
-                            "Your job is to proactively say one short, comforting, "
-                            "or funny distracting sentence (less than 15 words) "
-                            "to help them reset. DO NOT offer coding help. "
-                            "Just be a friend.")
-            },
-            {"role": "user", "content": "Get me a comforting phrase for a frustrated developer."}
-        ]
+        print("Getting comforting phrase...")
 
         response = self._call_openrouter(
-            model="deepseek/deepseek-chat",
-            messages=messages,
+            model=FAST_MODEL,
+            messages=(_SYS_COMFORT, _USER_COMFORT),
             max_tokens=50,
             temperature=1.2
         )
 
-        return response if response else "You've got this. I believe in you!"
+        if not response:
+            return random.choice(self._phrases)
 
-    def get_coding_help(self, code_text):
+        self._phrases.append(response)
+        return response
+
+    def _coding_help_messages(self, code_text):
+        """Build the Phase 2 prompt for a block of OCR'd code"""
+        return (
+            _SYS_CODING,
+            {"role": "user", "content": _USER_TEMPLATE_CODING.format(code=code_text)}
+        )
+
+    def _probe_fast_model(self, code_text):
         """
-        Phase 2: Calls a coding model with only OCR'd code.
-        This runs on the Laptop client.
+        Ask the fast model for an answer plus a self-reported confidence.
+
+        Returns:
+            tuple: (answer, confidence) where confidence is 0-10, or
+                   (None, 0) if the call failed
         """
-        print("Getting coding help for OCR'd text...")
+        probe_key = f"probe||{_hash_text(code_text)}"
+        cached = self.response_cache.get(probe_key)
+        if cached:
+            return cached
 
-        messages = [
-            {
-                "role": "system",
-                "content": ("You are an expert AI Debug Duck. You are helping a developer. "
-                            "You will be given a block of code from their screen. "
-                            "Concisely (in 2-3 sentences) identify the most likely bug "
-                            "and suggest a fix. Speak in a helpful, friendly tone.")
-            },
-            {"role": "user", "content": f"Here is the code I'm looking at:\n\n{code_text}"}
-        ]
+        messages = (_SYS_CODING_PROBE, self._coding_help_messages(code_text)[1])
 
         response = self._call_openrouter(
-            model="anthropic/claude-3.5-sonnet",
+            model=FAST_MODEL,
             messages=messages,
+            max_tokens=170,
+            temperature=0.3
+        )
+        if not response:
+            return None, 0
+
+        match = CONFIDENCE_PATTERN.search(response)
+        confidence = int(match.group(1)) if match else 0
+        answer = CONFIDENCE_PATTERN.sub("", response).strip()
+
+        self.response_cache.set(probe_key, (answer, confidence))
+        return answer, confidence
+
+    def _call_with_fallback(self, code_text):
+        """
+        Get coding help from the fast model, escalating to the strong model
+        when the fast model is not confident.
+
+        Returns:
+            str: The model's response text, or None on error
+        """
+        answer, confidence = self._probe_fast_model(code_text)
+        if answer and confidence >= CONFIDENCE_THRESHOLD:
+            print(f"Fast model confident ({confidence}/10), skipping escalation")
+            return answer
+
+        print(f"Fast model confidence {confidence}/10, escalating to {STRONG_MODEL}")
+        return self._call_openrouter(
+            model=STRONG_MODEL,
+            messages=self._coding_help_messages(code_text),
             max_tokens=150,
             temperature=0.3
         )
 
-        return response if response else "Sorry, I had trouble reading that code. Maybe try again?"
+    def get_coding_help(self, code_text):
+        """
+        Phase 2: Calls a coding model with only OCR'd code.
+        This runs on the Laptop client.
+        """
+        print("Getting coding help for OCR'd text...")
+
+        code_text = _preprocess_code(code_text)
+        cache_key = _hash_text(code_text)
+        cached = self.response_cache.get(cache_key)
+        if cached:
+            print("Using cached coding help")
+            return cached
+
+        if SEGMENT_ANALYSIS and len(_split_segments(code_text)) > 1:
+            response = self._get_segmented_coding_help(code_text)
+            if response:
+                self.response_cache.set(cache_key, response)
+                return response
+            print("Segment analysis failed, falling back to full-screen request")
+
+        response = self._call_with_fallback(code_text)
+
+        if not response:
+            return "Sorry, I had trouble reading that code. Maybe try again?"
+
+        self.response_cache.set(cache_key, response)
+        return response
+
+    def stream_coding_help(self, code_text):
+        """
+        Phase 2, streamed: yields the answer sentence-by-sentence so speech
+        can start before the model has finished generating.
+        Falls back to the blocking call if streaming fails before any output.
+        """
+        code_text = _preprocess_code(code_text)
+        cache_key = _hash_text(code_text)
+        cached = self.response_cache.get(cache_key)
+        if cached:
+            print("Using cached coding help")
+            yield cached
+            return
+
+        if SEGMENT_ANALYSIS and len(_split_segments(code_text)) > 1:
+            # Segment analysis merges notes at the end, so there is nothing to stream
+            yield self.get_coding_help(code_text)
+            return
+
+        answer, confidence = self._probe_fast_model(code_text)
+        if answer and confidence >= CONFIDENCE_THRESHOLD:
+            print(f"Fast model confident ({confidence}/10), skipping escalation")
+            self.response_cache.set(cache_key, answer)
+            yield answer
+            return
+
+        print("Streaming coding help for OCR'd text...")
+        sentences = []
+        try:
+            for sentence in self._stream_openrouter(
+                model=STRONG_MODEL,
+                messages=self._coding_help_messages(code_text),
+                max_tokens=150,
+                temperature=0.3
+            ):
+                sentences.append(sentence)
+                yield sentence
+        except Exception as e:
+            print(f"Error streaming from OpenRouter: {e}")
+            if not sentences:
+                yield self.get_coding_help(code_text)
+            return
+
+        if sentences:
+            self.response_cache.set(cache_key, " ".join(sentences))
+        else:
+            yield "Sorry, I had trouble reading that code. Maybe try again?"
 
     def get_contextual_help(self, code_text, user_question):
         """
@@ -142,29 +651,128 @@ class LLMRouter:
         """
         print("Getting contextual help for OCR + STT...")
 
-        messages = [
-            {
-                "role": "system",
-                "content": ("You are an expert AI Debug Duck. You are helping a developer. "
-                            "You will be given their spoken question AND the code on their screen. "
-                            "Directly answer their question, using the code for context. "
-                            "Be concise, helpful, and friendly. Speak as a companion.")
-            },
+        code_text = _preprocess_code(code_text)
+        cache_key = f"{_hash_text(code_text)}||{user_question.strip().lower()}"
+        cached = self.response_cache.get(cache_key)
+        if cached:
+            print("Using cached contextual help")
+            return cached
+
+        messages = (
+            _SYS_CONTEXT,
             {
                 "role": "user",
-                "content": (f"My question is: '{user_question}'\n\n"
-                            f"Here is the code on my screen:\n{code_text}")
+                "content": _USER_TEMPLATE_CONTEXT.format(question=user_question, code=code_text)
             }
-        ]
+        )
 
         response = self._call_openrouter(
-            model="anthropic/claude-3.5-sonnet",
+            model=STRONG_MODEL,
             messages=messages,
             max_tokens=150,
             temperature=0.3
         )
 
-        return response if response else "Sorry, I had trouble understanding. Could you ask again?"
+        if not response:
+            return "Sorry, I had trouble understanding. Could you ask again?"
+
+        self.response_cache.set(cache_key, response)
+        return response
+
+
+class BatchingLLMRouter(LLMRouter):
+    """
+    LLMRouter that runs OpenRouter calls through a bounded concurrent
+    dispatcher. Each call is still its own request; calls are queued and a
+    dispatcher thread hands them, up to batch_max at a time (waiting at most
+    batch_wait_timeout_s for more to arrive), to a worker pool that sends
+    them over the shared keep-alive session. This caps how many requests
+    are in flight during a burst; it does not merge them.
+    """
+
+    def __init__(self, batch_max=BATCH_MAX, batch_wait_timeout_s=BATCH_WAIT_TIMEOUT_S):
+        super().__init__()
+        self.batch_max = batch_max
+        self.batch_wait_timeout_s = batch_wait_timeout_s
+        self._pending = queue.Queue()
+        self._workers = ThreadPoolExecutor(max_workers=batch_max)
+        self._closed = False
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    def _call_openrouter(self, model, messages, max_tokens=150, temperature=0.3):
+        """Queue the call for the dispatcher and wait for its result"""
+        if self._closed or not self._dispatcher.is_alive():
+            print("OpenRouter dispatcher is not running")
+            return None
+        future = Future()
+        self._pending.put(((model, messages, max_tokens, temperature), future))
+        try:
+            return future.result(timeout=BATCH_CALL_TIMEOUT_S)
+        except FutureTimeoutError:
+            print("OpenRouter call timed out waiting for the dispatcher")
+            return None
+        except Exception as e:
+            print(f"Error calling OpenRouter: {e}")
+            return None
+
+    def close(self):
+        """Stop the dispatcher, failing any calls still queued"""
+        self._closed = True
+        self._pending.put(None)
+        self._dispatcher.join(timeout=5)
+        self._workers.shutdown(wait=False)
+
+    def _dispatch_loop(self):
+        """Hand queued calls to the worker pool, up to batch_max at a time"""
+        try:
+            while True:
+                item = self._pending.get()
+                if item is None:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.batch_wait_timeout_s
+                while len(batch) < self.batch_max:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._pending.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        self._pending.put(None)  # stop after this batch
+                        break
+                    batch.append(item)
+
+                if len(batch) > 1:
+                    print(f"Dispatching {len(batch)} OpenRouter calls")
+                for args, future in batch:
+                    try:
+                        self._workers.submit(self._run_call, args, future)
+                    except Exception as e:
+                        future.set_exception(e)
+        except Exception as e:
+            print(f"OpenRouter dispatcher stopped: {e}")
+        finally:
+            self._closed = True
+            self._fail_pending(RuntimeError("OpenRouter dispatcher stopped"))
+
+    def _fail_pending(self, error):
+        """Fail every call still waiting in the queue"""
+        while True:
+            try:
+                item = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[1].set_exception(error)
+
+    def _run_call(self, args, future):
+        try:
+            future.set_result(LLMRouter._call_openrouter(self, *args))
+        except Exception as e:
+            future.set_exception(e)
 
 
 # Example usage / testing
@@ -3,11 +3,53 @@ OCR Service for Debug Duck
 Captures screenshots and extracts text using mss and pytesseract
 """
 
+import os
+from config import CONFIG
+
+# Tesseract's OpenMP fan-out slows single-image OCR down on few cores; with
+# tesserocr, tiles are parallelised below instead. Must be set before Tesseract is loaded
+# (config has already applied .env, so a value there still wins).
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
 import mss
 import pytesseract
 from PIL import Image
+import atexit
+import ctypes
+import hashlib
+import io
 import logging
-import os
+import string
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# numpy is optional; it does the BGRX -> RGB swizzle as a strided view
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# OpenCV is optional; with it screenshots are Otsu-binarized before OCR
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# python-xlib is optional; on X11 it finds the focused window to crop to
+try:
+    from Xlib import X, display as xdisplay
+except ImportError:
+    xdisplay = None
+
+# tesserocr is optional; it keeps one Tesseract instance (and its loaded
+# models) in-process instead of spawning tesseract.exe for every call
+try:
+    from tesserocr import PyTessBaseAPI, PSM, OEM
+except ImportError:
+    PyTessBaseAPI = None
 
 # Set up logging
 logging.basicConfig(
@@ -16,13 +58,297 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Configure pytesseract path for Windows
+# Configure pytesseract path for Windows (only used without tesserocr)
 # Update this path if Tesseract is installed elsewhere
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
+# Optional tessdata directory for tesserocr (defaults to Tesseract's own)
+TESSDATA_PATH = os.environ.get("TESSDATA_PREFIX")
+
+# Shared tesserocr API; the object is not reentrant so calls hold a lock
+_tess_api = None
+_tess_lock = threading.Lock()
+
+
+# Code screens are a uniform block of ASCII text: PSM 6 ("single block")
+# skips page layout analysis, and the whitelist stops Tesseract guessing
+# ligatures and other Unicode look-alikes. Pass code=False for other text.
+CODE_PSM = 6
+CODE_CHAR_WHITELIST = string.ascii_letters + string.digits + string.punctuation + " "
+
+
+def _new_tess_api():
+    """Create a tesserocr API with the service's OCR settings"""
+    kwargs = {"lang": "eng", "psm": PSM.SINGLE_BLOCK, "oem": OEM.LSTM_ONLY}
+    if TESSDATA_PATH:
+        kwargs["path"] = TESSDATA_PATH
+    return PyTessBaseAPI(**kwargs)
+
+
+def _get_tess_api():
+    """Create the tesserocr API on first use (call with _tess_lock held)"""
+    global _tess_api
+    if _tess_api is None:
+        _tess_api = _new_tess_api()
+        logger.info("tesserocr API initialized")
+    return _tess_api
+
+
+def _binarize(img):
+    """
+    Reduce a screenshot to one channel before OCR. With OpenCV this is an
+    Otsu black/white image (numpy array) with dark text on a light
+    background; otherwise a PIL grayscale image.
+    """
+    if cv2 is None or np is None:
+        return img.convert("L")
+
+    gray = cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2GRAY)
+    _, bw = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # Dark editor themes come out as light text on black; Tesseract reads
+    # dark-on-light far better, so flip when most of the image is black
+    if cv2.countNonZero(bw) < bw.size // 2:
+        bw = cv2.bitwise_not(bw)
+    return bw
+
+
+def _tess_read(api, prepared, code):
+    """Run a tesserocr API over a _binarize() result"""
+    # The API is reused across calls, so set the mode every time
+    api.SetPageSegMode(PSM.SINGLE_BLOCK if code else PSM.AUTO)
+    api.SetVariable("tessedit_char_whitelist", CODE_CHAR_WHITELIST if code else "")
+    if isinstance(prepared, Image.Image):
+        api.SetImage(prepared)
+    else:
+        height, width = prepared.shape
+        api.SetImageBytes(prepared.tobytes(), width, height, 1, width)
+    return api.GetUTF8Text()
+
+
+def _image_to_string(img, code=True):
+    """Run OCR on a PIL image with tesserocr if available, else pytesseract"""
+    prepared = _binarize(img)
+    if PyTessBaseAPI is not None:
+        # OCR pool threads own a private API and don't need the shared lock
+        api = getattr(_tess_tls, "api", None)
+        if api is not None:
+            return _tess_read(api, prepared, code)
+        with _tess_lock:
+            return _tess_read(_get_tess_api(), prepared, code)
+    return _tesseract_cli(prepared, code)
+
+
+def _tesseract_cli(prepared, code):
+    """
+    Run the tesseract executable on a _binarize() result, piping the image
+    in as uncompressed PNM and reading the text from stdout. Unlike
+    pytesseract this skips the PNG encode and the temp files both ways.
+    """
+    if not isinstance(prepared, Image.Image):
+        prepared = Image.fromarray(prepared)
+    buffer = io.BytesIO()
+    prepared.save(buffer, "PPM")
+
+    # LSTM engine only (as with tesserocr's OEM.LSTM_ONLY), skipping the
+    # legacy classifier that the default engine mode also loads
+    args = [pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout", "-l", "eng", "--oem", "1"]
+    if code:
+        # Passed as argv (no shell), so the quotes in the whitelist are safe
+        args += ["--psm", str(CODE_PSM), "-c", f"tessedit_char_whitelist={CODE_CHAR_WHITELIST}"]
+
+    result = subprocess.run(
+        args,
+        input=buffer.getvalue(),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode("utf-8", errors="replace").strip())
+    return result.stdout.decode("utf-8", errors="replace")
+
+
+# With tesserocr, changed tiles are OCR'd in parallel on this many threads,
+# each with its own API (tesserocr releases the GIL while recognising). The
+# tesseract executable never uses the pool: parallel processes would each
+# load the model, so it gets one call per frame instead.
+OCR_WORKERS = CONFIG.ocr_workers
+_tess_tls = threading.local()
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+
+def _init_ocr_worker():
+    """Give each OCR pool thread its own tesserocr API"""
+    _tess_tls.api = _new_tess_api()
+
+
+def _get_ocr_pool():
+    """Create the tile OCR thread pool on first use"""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ThreadPoolExecutor(
+                max_workers=OCR_WORKERS,
+                thread_name_prefix="ocr",
+                initializer=_init_ocr_worker
+            )
+        return _ocr_pool
+
+
+# One mss instance per thread (mss handles aren't safe to share across
+# threads); reusing it avoids reopening the display/DC on every capture
+_tls = threading.local()
+_sct_instances = []
+_sct_lock = threading.Lock()
+
+
+def _get_sct():
+    """Return this thread's mss instance, creating it on first use"""
+    sct = getattr(_tls, "sct", None)
+    if sct is None:
+        sct = mss.mss()
+        _tls.sct = sct
+        with _sct_lock:
+            _sct_instances.append(sct)
+    return sct
+
+
+@atexit.register
+def _close_sct():
+    """Release every mss instance created by _get_sct"""
+    with _sct_lock:
+        for sct in _sct_instances:
+            try:
+                sct.close()
+            except Exception:
+                pass
+        _sct_instances.clear()
+
+
+# OCR results keyed by screenshot content; re-OCRing an identical screen
+# costs one hash instead of a full Tesseract pass
+OCR_CACHE_SIZE = CONFIG.ocr_cache_size
+# With tesserocr the frame is also OCR'd as horizontal tiles so a partly
+# changed screen only re-reads the tiles that changed (set OCR_TILES=1 to
+# disable). Not with the tesseract executable: every tile would be another
+# process reloading the model, and one full-frame call is both faster and
+# reads better (each band loses the lines around it).
+OCR_TILES = CONFIG.ocr_tiles if PyTessBaseAPI is not None else 1
+# Tile boundaries move up to this many rows to land between text lines
+TILE_SNAP_ROWS = 12
+
+_ocr_cache = OrderedDict()
+_tile_cache = OrderedDict()
+_ocr_cache_lock = threading.Lock()
+_tile_frame_size = None
+
+
+def frame_hash(img):
+    """Content hash of a captured frame, used as the OCR cache key"""
+    digest = hashlib.blake2b(img.tobytes(), digest_size=16).digest()
+    return img.size, digest
+
+
+def _cache_get(cache, key):
+    with _ocr_cache_lock:
+        text = cache.get(key)
+        if text is not None:
+            cache.move_to_end(key)
+        return text
+
+
+def _cache_set(cache, key, text, max_size):
+    with _ocr_cache_lock:
+        cache[key] = text
+        cache.move_to_end(key)
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+
+
+def _tile_bounds(img):
+    """
+    Split the frame into OCR_TILES horizontal bands, nudging each cut to the
+    nearby row with the fewest colours so it falls between lines of text
+    """
+    width, height = img.size
+    cuts = [0]
+    for i in range(1, OCR_TILES):
+        nominal = height * i // OCR_TILES
+        best, best_colors = nominal, None
+        for y in range(max(cuts[-1] + 1, nominal - TILE_SNAP_ROWS),
+                       min(height - 1, nominal + TILE_SNAP_ROWS) + 1):
+            colors = img.crop((0, y, width, y + 1)).getcolors(maxcolors=256)
+            count = len(colors) if colors is not None else 257
+            if best_colors is None or count < best_colors:
+                best, best_colors = y, count
+        cuts.append(best)
+    cuts.append(height)
+    return [(top, bottom) for top, bottom in zip(cuts, cuts[1:]) if bottom > top]
+
+
+def _ocr_tiles(img, code=True):
+    """OCR a frame tile by tile, reusing cached text for unchanged tiles"""
+    global _tile_frame_size
+
+    if OCR_TILES <= 1:
+        return _image_to_string(img, code)
+
+    with _ocr_cache_lock:
+        # Tiles from a different resolution will never match again
+        if img.size != _tile_frame_size:
+            _tile_cache.clear()
+            _tile_frame_size = img.size
+
+    # Changed tiles are handed to the pool as soon as they're found, so
+    # Tesseract is already reading the first ones while the rest of the
+    # frame is still being cropped and hashed
+    pool = _get_ocr_pool() if OCR_WORKERS > 1 and PyTessBaseAPI is not None else None
+    width = img.size[0]
+    texts = []
+    missing = []
+    for top, bottom in _tile_bounds(img):
+        tile = img.crop((0, top, width, bottom))
+        key = (frame_hash(tile), code)
+        texts.append(_cache_get(_tile_cache, key))
+        if texts[-1] is None:
+            pending = pool.submit(_image_to_string, tile, code) if pool else tile
+            missing.append((len(texts) - 1, key, pending))
+
+    for index, key, pending in missing:
+        text = pending.result() if pool else _image_to_string(pending, code)
+        texts[index] = text
+        _cache_set(_tile_cache, key, text, OCR_CACHE_SIZE * OCR_TILES)
+
+    logger.debug(f"Tile OCR reused {len(texts) - len(missing)} cached tiles")
+    return "\n".join(text.rstrip() for text in texts if text.strip())
+
+
+def _to_rgb(sct_img):
+    """Convert an mss screenshot (BGRX) into an RGB PIL image"""
+    if np is not None:
+        width, height = sct_img.size
+        bgrx = np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(height, width, 4)
+        # Dropping X and reversing BGR are both views; the copy into this
+        # thread's reusable frame buffer makes it contiguous without
+        # allocating a new full-screen array per capture
+        rgb = getattr(_tls, "frame", None)
+        if rgb is None or rgb.shape[:2] != (height, width):
+            rgb = np.empty((height, width, 3), dtype=np.uint8)
+            _tls.frame = rgb
+        np.copyto(rgb, bgrx[:, :, 2::-1])
+        # PIL copies the pixels into its own storage, so the buffer is free
+        # for the next capture as soon as this returns
+        return Image.fromarray(rgb, "RGB")
+    return Image.frombuffer("RGB", sct_img.size, memoryview(sct_img.raw), "raw", "BGRX", 0, 1)
+
+
 # Verify Tesseract is available
-def verify_tesseract():
-    """Check if Tesseract is properly installed and accessible"""
+def _check_tesseract():
+    """Look for Tesseract once at import and log the result"""
+    if PyTessBaseAPI is not None:
+        logger.info("Using tesserocr for OCR")
+        return True
     tesseract_path = pytesseract.pytesseract.tesseract_cmd
     if not os.path.exists(tesseract_path):
         logger.error(f"Tesseract not found at: {tesseract_path}")
@@ -31,10 +357,181 @@ def verify_tesseract():
     return True
 
 
-def capture_and_ocr():
+_TESS_OK = _check_tesseract()
+
+
+def verify_tesseract():
+    """Check if Tesseract is properly installed and accessible"""
+    return _TESS_OK
+
+
+# Capture only the focused window (usually the editor) instead of the whole
+# monitor; Tesseract's cost is roughly linear in pixel count
+OCR_ACTIVE_WINDOW = CONFIG.ocr_active_window
+# Smaller "windows" are popups/docks rather than something worth reading
+MIN_WINDOW_SIZE = (200, 100)
+
+
+def _foreground_window_rect():
+    """Return (left, top, right, bottom) of the focused window, or None"""
+    if sys.platform == "win32":
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        hwnd = user32.GetForegroundWindow()
+        rect = wintypes.RECT()
+        if not hwnd or not user32.GetWindowRect(hwnd, ctypes.byref(rect)):
+            return None
+        return rect.left, rect.top, rect.right, rect.bottom
+
+    if xdisplay is not None:
+        # Keep one X connection per thread, like the mss instances
+        disp = getattr(_tls, "xdisplay", None)
+        if disp is None:
+            disp = xdisplay.Display()
+            _tls.xdisplay = disp
+        root = disp.screen().root
+        prop = root.get_full_property(disp.intern_atom("_NET_ACTIVE_WINDOW"), X.AnyPropertyType)
+        if not prop or not prop.value or not prop.value[0]:
+            return None
+        window = disp.create_resource_object("window", prop.value[0])
+        geometry = window.get_geometry()
+        origin = root.translate_coords(window, 0, 0)
+        return origin.x, origin.y, origin.x + geometry.width, origin.y + geometry.height
+
+    return None
+
+
+def _active_window_region(sct):
+    """
+    Region of the focused window clipped to the desktop, as an mss monitor
+    dict, or None to fall back to the full primary monitor
+    """
+    if not OCR_ACTIVE_WINDOW:
+        return None
+    try:
+        rect = _foreground_window_rect()
+    except Exception as e:
+        logger.debug(f"Could not get active window: {str(e)}")
+        return None
+    if rect is None:
+        return None
+
+    desktop = sct.monitors[0]
+    left = max(rect[0], desktop["left"])
+    top = max(rect[1], desktop["top"])
+    right = min(rect[2], desktop["left"] + desktop["width"])
+    bottom = min(rect[3], desktop["top"] + desktop["height"])
+    if right - left < MIN_WINDOW_SIZE[0] or bottom - top < MIN_WINDOW_SIZE[1]:
+        return None
+    return {"left": left, "top": top, "width": right - left, "height": bottom - top}
+
+
+def capture_screen():
+    """
+    Captures a screenshot of the focused window, or of the primary monitor
+    if the window can't be found.
+
+    Returns:
+        tuple: (PIL.Image, None) on success, or (None, error message) on failure
+    """
+    try:
+        logger.debug("Getting mss instance for screenshot capture")
+        sct = _get_sct()
+        # Get the focused window, else the first monitor (primary display)
+        try:
+            monitor = _active_window_region(sct) or sct.monitors[1]
+            logger.debug(f"Monitor info: {monitor}")
+        except IndexError:
+            error_msg = "Could not capture screen - No monitor detected"
+            logger.error(error_msg)
+            return None, error_msg
+
+        # Capture the screen
+        try:
+            logger.info("Capturing screenshot...")
+            sct_img = sct.grab(monitor)
+            logger.debug(f"Screenshot captured: size={sct_img.size}")
+        except Exception as e:
+            error_msg = "Could not capture screen"
+            logger.error(f"{error_msg}: {str(e)}")
+            return None, error_msg
+
+        # Convert to a PIL Image for OCR, reading mss's raw buffer directly
+        # instead of copying it out through .bgra first
+        try:
+            img = _to_rgb(sct_img)
+            logger.debug("Screenshot converted to PIL Image")
+        except Exception as e:
+            error_msg = "Could not capture screen - Image conversion failed"
+            logger.error(f"{error_msg}: {str(e)}")
+            return None, error_msg
+
+        return img, None
+
+    except Exception as e:
+        error_msg = "Could not capture screen"
+        logger.error(f"{error_msg}: Unexpected error - {str(e)}")
+        return None, error_msg
+
+
+def ocr_image(img, frame_key=None, code=True):
+    """
+    Runs OCR on an already captured screenshot.
+
+    Args:
+        img (PIL.Image): The screenshot to read
+        frame_key: frame_hash(img), if the caller has already computed it
+        code (bool): Read the image as a block of source code (PSM 6 with an
+            ASCII whitelist); pass False for general text
+
+    Returns:
+        str: The extracted text, or an error message if OCR fails
+    """
+    if not verify_tesseract():
+        error_msg = "Could not capture screen - Tesseract OCR not found"
+        logger.error(error_msg)
+        return error_msg
+
+    if frame_key is None:
+        frame_key = frame_hash(img)
+
+    # Run OCR
+    try:
+        cache_key = (frame_key, code)
+        text = _cache_get(_ocr_cache, cache_key)
+        if text is not None:
+            logger.info("Screenshot unchanged, reusing cached OCR text")
+        else:
+            logger.info("Running OCR on screenshot...")
+            text = _ocr_tiles(img, code)
+            _cache_set(_ocr_cache, cache_key, text, OCR_CACHE_SIZE)
+            logger.debug(f"OCR completed, extracted {len(text)} characters")
+    except (pytesseract.TesseractNotFoundError, FileNotFoundError):
+        error_msg = "Could not capture screen - Tesseract executable not found"
+        logger.error(error_msg)
+        return error_msg
+    except Exception as e:
+        error_msg = "Could not capture screen - OCR processing failed"
+        logger.error(f"{error_msg}: {str(e)}")
+        return error_msg
+
+    # Check if any text was found
+    if text.strip():
+        logger.info(f"OCR SUCCESS: Extracted {len(text)} characters")
+        return text
+    else:
+        error_msg = "No code detected"
+        logger.warning(error_msg + " - Screen may be blank or contain only images")
+        return error_msg
+
+
+def capture_and_ocr(code=True):
     """
     Captures a screenshot of the primary monitor and runs OCR to extract text.
 
+    Args:
+        code (bool): Read the screen as source code (see ocr_image)
+
     Returns:
         str: The extracted text from the screenshot, or an error message if OCR fails
     """
@@ -46,67 +543,14 @@ def capture_and_ocr():
         logger.error(error_msg)
         return error_msg
 
-    try:
-        logger.debug("Initializing mss for screenshot capture")
-        with mss.mss() as sct:
-            # Get the first monitor (primary display)
-            try:
-                monitor = sct.monitors[1]
-                logger.debug(f"Monitor info: {monitor}")
-            except IndexError:
-                error_msg = "Could not capture screen - No monitor detected"
-                logger.error(error_msg)
-                return error_msg
-
-            # Capture the screen
-            try:
-                logger.info("Capturing screenshot...")
-                sct_img = sct.grab(monitor)
-                logger.debug(f"Screenshot captured: size={sct_img.size}")
-            except Exception as e:
-                error_msg = "Could not capture screen"
-                logger.error(f"{error_msg}: {str(e)}")
-                return error_msg
-
-            # Convert to a PIL Image for pytesseract
-            try:
-                img = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
-                logger.debug("Screenshot converted to PIL Image")
-            except Exception as e:
-                error_msg = "Could not capture screen - Image conversion failed"
-                logger.error(f"{error_msg}: {str(e)}")
-                return error_msg
-
-            # Run OCR
-            try:
-                logger.info("Running OCR on screenshot...")
-                text = pytesseract.image_to_string(img)
-                logger.debug(f"OCR completed, extracted {len(text)} characters")
-            except pytesseract.TesseractNotFoundError:
-                error_msg = "Could not capture screen - Tesseract executable not found"
-                logger.error(error_msg)
-                return error_msg
-            except Exception as e:
-                error_msg = "Could not capture screen - OCR processing failed"
-                logger.error(f"{error_msg}: {str(e)}")
-                return error_msg
-
-            # Check if any text was found
-            if text.strip():
-                logger.info(f"OCR SUCCESS: Extracted {len(text)} characters")
-                return text
-            else:
-                error_msg = "No code detected"
-                logger.warning(error_msg + " - Screen may be blank or contain only images")
-                return error_msg
-
-    except Exception as e:
-        error_msg = "Could not capture screen"
-        logger.error(f"{error_msg}: Unexpected error - {str(e)}")
+    img, error_msg = capture_screen()
+    if img is None:
         return error_msg
 
+    return ocr_image(img, code=code)
 
-def capture_region_and_ocr(x, y, width, height):
+
+def capture_region_and_ocr(x, y, width, height, code=True):
     """
     Captures a specific region of the screen and runs OCR.
 
@@ -115,6 +559,7 @@ def capture_region_and_ocr(x, y, width, height):
         y (int): Top coordinate
         width (int): Width of region
         height (int): Height of region
+        code (bool): Read the region as source code (see ocr_image)
 
     Returns:
         str: The extracted text from the screenshot region
@@ -134,57 +579,57 @@ def capture_region_and_ocr(x, y, width, height):
             logger.error(f"{error_msg}: width={width}, height={height}")
             return error_msg
 
-        logger.debug("Initializing mss for region capture")
-        with mss.mss() as sct:
-            # Define the region to capture
-            monitor = {
-                "top": y,
-                "left": x,
-                "width": width,
-                "height": height
-            }
-
-            # Capture the region
-            try:
-                logger.info(f"Capturing region...")
-                sct_img = sct.grab(monitor)
-                logger.debug(f"Region captured: size={sct_img.size}")
-            except Exception as e:
-                error_msg = "Could not capture screen"
-                logger.error(f"{error_msg}: Region capture failed - {str(e)}")
-                return error_msg
-
-            # Convert to PIL Image
-            try:
-                img = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
-                logger.debug("Region screenshot converted to PIL Image")
-            except Exception as e:
-                error_msg = "Could not capture screen - Image conversion failed"
-                logger.error(f"{error_msg}: {str(e)}")
-                return error_msg
-
-            # Run OCR
-            try:
-                logger.info("Running OCR on region...")
-                text = pytesseract.image_to_string(img)
-                logger.debug(f"Region OCR completed, extracted {len(text)} characters")
-            except pytesseract.TesseractNotFoundError:
-                error_msg = "Could not capture screen - Tesseract executable not found"
-                logger.error(error_msg)
-                return error_msg
-            except Exception as e:
-                error_msg = "Could not capture screen - OCR processing failed"
-                logger.error(f"{error_msg}: {str(e)}")
-                return error_msg
-
-            # Check if any text was found
-            if text.strip():
-                logger.info(f"Region OCR SUCCESS: Extracted {len(text)} characters")
-                return text
-            else:
-                error_msg = "No code detected"
-                logger.warning(error_msg + " - Region may be blank or contain only images")
-                return error_msg
+        logger.debug("Getting mss instance for region capture")
+        sct = _get_sct()
+        # Define the region to capture
+        monitor = {
+            "top": y,
+            "left": x,
+            "width": width,
+            "height": height
+        }
+
+        # Capture the region
+        try:
+            logger.info(f"Capturing region...")
+            sct_img = sct.grab(monitor)
+            logger.debug(f"Region captured: size={sct_img.size}")
+        except Exception as e:
+            error_msg = "Could not capture screen"
+            logger.error(f"{error_msg}: Region capture failed - {str(e)}")
+            return error_msg
+
+        # Convert to PIL Image
+        try:
+            img = _to_rgb(sct_img)
+            logger.debug("Region screenshot converted to PIL Image")
+        except Exception as e:
+            error_msg = "Could not capture screen - Image conversion failed"
+            logger.error(f"{error_msg}: {str(e)}")
+            return error_msg
+
+        # Run OCR
+        try:
+            logger.info("Running OCR on region...")
+            text = _image_to_string(img, code)
+            logger.debug(f"Region OCR completed, extracted {len(text)} characters")
+        except (pytesseract.TesseractNotFoundError, FileNotFoundError):
+            error_msg = "Could not capture screen - Tesseract executable not found"
+            logger.error(error_msg)
+            return error_msg
+        except Exception as e:
+            error_msg = "Could not capture screen - OCR processing failed"
+            logger.error(f"{error_msg}: {str(e)}")
+            return error_msg
+
+        # Check if any text was found
+        if text.strip():
+            logger.info(f"Region OCR SUCCESS: Extracted {len(text)} characters")
+            return text
+        else:
+            error_msg = "No code detected"
+            logger.warning(error_msg + " - Region may be blank or contain only images")
+            return error_msg
 
     except Exception as e:
         error_msg = "Could not capture screen"
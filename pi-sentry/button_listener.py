@@ -17,7 +17,10 @@ except ImportError:
 
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import select
 from dotenv import load_dotenv
 import logging
 import threading
@@ -32,7 +35,21 @@ load_dotenv()
 # Configuration
 BUTTON_PIN = int(os.environ.get("BUTTON_GPIO_PIN", 17))
 DEBOUNCE_TIME = float(os.environ.get("BUTTON_DEBOUNCE_TIME", 1.0))
+DEBOUNCE_NS = int(DEBOUNCE_TIME * 1e9)
 LAPTOP_CLIENT_URL = os.environ.get("LAPTOP_CLIENT_URL", "http://YOUR_LAPTOP_IP:5001/get-help")
+LAPTOP_CONNECT_TIMEOUT = 3
+LAPTOP_READ_TIMEOUT = 30
+
+# Keep-alive session so repeated presses reuse the socket to the laptop.
+# Only connection failures are retried: a read timeout means the laptop got
+# the request and may already be answering it.
+_session = requests.Session()
+_session.headers.update({"Connection": "keep-alive"})
+_session.mount("http://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=2,
+    max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.1)
+))
 
 
 class ButtonListener:
@@ -51,7 +68,12 @@ class ButtonListener:
         self.button_callback = button_callback
         self.running = False
         self.thread = None
-        self.last_press_time = 0
+        self._last_press_ns = 0
+        # Set by stop(); the monitor thread blocks on it (or on the wake pipe
+        # for gpiod) instead of waking up every second to check a flag
+        self._stop_event = threading.Event()
+        self._wake_r = None
+        self._wake_w = None
 
         # Set up GPIO
         self._setup_gpio()
@@ -102,15 +124,19 @@ class ButtonListener:
 
     def _handle_button_press(self):
         """Handle button press (with debouncing)"""
-        current_time = time.time()
+        # Monotonic clock: NTP adjustments can't make presses look too close
+        now = time.monotonic_ns()
 
         # Debounce: ignore if pressed too recently
-        if current_time - self.last_press_time < DEBOUNCE_TIME:
+        if now - self._last_press_ns < DEBOUNCE_NS:
             logger.debug("Button press ignored (debounce)")
             return
 
-        self.last_press_time = current_time
+        self._last_press_ns = now
+        self._on_press()
 
+    def _on_press(self):
+        """Run the press action (callers have already debounced)"""
         logger.info("🔘 BUTTON PRESSED!")
 
         # Call callback if provided
@@ -128,7 +154,10 @@ class ButtonListener:
         logger.info(f"Sending help request to: {LAPTOP_CLIENT_URL}")
 
         try:
-            response = requests.get(LAPTOP_CLIENT_URL, timeout=30)
+            response = _session.get(
+                LAPTOP_CLIENT_URL,
+                timeout=(LAPTOP_CONNECT_TIMEOUT, LAPTOP_READ_TIMEOUT)
+            )
 
             if response.status_code == 200:
                 logger.info("✅ Help request successful")
@@ -155,22 +184,28 @@ class ButtonListener:
 
         try:
             if GPIO_LIB == 'gpiod':
-                # gpiod 2.x monitoring loop
-                while self.running:
-                    # Wait for edge events with timeout (1 second)
-                    if self.request.wait_edge_events(timeout=1.0):
+                # gpiod 2.x monitoring loop: sleep until there's an edge
+                # event or stop() writes to the wake pipe
+                request_fd = self.request.fd
+                while not self._stop_event.is_set():
+                    readable, _, _ = select.select([request_fd, self._wake_r], [], [])
+                    if request_fd in readable:
                         events = self.request.read_edge_events()
                         for event in events:
                             if event.event_type == event.Type.RISING_EDGE:
                                 self._handle_button_press()
 
             elif GPIO_LIB == 'RPi.GPIO':
-                # RPi.GPIO monitoring loop
-                while self.running:
-                    # Wait for rising edge (button press)
-                    channel = GPIO.wait_for_edge(BUTTON_PIN, GPIO.RISING, timeout=1000)
-                    if channel is not None:
-                        self._handle_button_press()
+                # RPi.GPIO calls us back on its own thread; bouncetime does
+                # the debouncing, so presses go straight to _on_press
+                GPIO.add_event_detect(
+                    BUTTON_PIN,
+                    GPIO.RISING,
+                    callback=lambda channel: self._on_press(),
+                    bouncetime=int(DEBOUNCE_TIME * 1000)
+                )
+                self._stop_event.wait()
+                GPIO.remove_event_detect(BUTTON_PIN)
 
         except Exception as e:
             logger.error(f"Error in button monitoring loop: {e}")
@@ -185,6 +220,9 @@ class ButtonListener:
             return False
 
         self.running = True
+        self._stop_event.clear()
+        if GPIO_LIB == 'gpiod':
+            self._wake_r, self._wake_w = os.pipe()
         self.thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.thread.start()
 
@@ -199,11 +237,19 @@ class ButtonListener:
 
         logger.info("Stopping Button Listener...")
         self.running = False
+        self._stop_event.set()
+        if self._wake_w is not None:
+            os.write(self._wake_w, b"x")
 
         # Wait for thread to finish
         if self.thread:
             self.thread.join(timeout=5)
 
+        for fd in (self._wake_r, self._wake_w):
+            if fd is not None:
+                os.close(fd)
+        self._wake_r = self._wake_w = None
+
         # Clean up GPIO
         try:
             if GPIO_LIB == 'gpiod':
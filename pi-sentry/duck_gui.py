@@ -6,6 +6,14 @@ Displays the animated duck on the 7" touchscreen with emotion states
 import pygame
 import pygame.time
 import os
+
+# pygame's SDL2 render API composites on the GPU instead of software blits.
+# It's still experimental in pygame, so it's opt-in (GUI_SDL2_RENDERER=true)
+# and the surface path is used when it isn't available.
+try:
+    from pygame._sdl2 import video as sdl2_video
+except ImportError:
+    sdl2_video = None
 from dotenv import load_dotenv
 import logging
 import threading
@@ -20,6 +28,10 @@ load_dotenv()
 
 # Configuration
 DUCK_IMAGE_PATH = os.environ.get("DUCK_IMAGE_PATH", "assets/animations/duck_neutral.png")
+BACKGROUND_COLOR = (50, 50, 70)  # Dark blue-gray background
+ACTIVE_FPS = 30  # While there's something to redraw
+IDLE_FPS = 10    # Otherwise just poll for events
+USE_SDL2_RENDERER = os.environ.get("GUI_SDL2_RENDERER", "false").lower() == "true"
 
 
 class DuckGUI:
@@ -37,11 +49,29 @@ class DuckGUI:
         """
         self.fullscreen = fullscreen
         self.running = False
+        # Set to stop the GUI loop; also wakes the sleep fallback immediately
+        self._stop_event = threading.Event()
         self.current_emotion = "neutral"
-        self.thread = None
+        # When set, the GUI loop reverts to neutral at this time.monotonic()
+        # deadline; any later set_emotion replaces it (latest wins)
+        self._revert_at = None
+        self._emotion_lock = threading.Lock()
+
+        # Only redraw when the emotion changes; _prev_rect is the area the
+        # last duck covered (None forces a full-screen redraw)
+        self._dirty = True
+        self._prev_rect = None
 
-        # Duck images for different emotions
+        # Duck images for different emotions, and where each is drawn
         self.duck_images = {}
+        self.duck_rects = {}
+        # All duck images baked side by side into one surface; atlas_rects
+        # is each emotion's cell within it
+        self.atlas = None
+        self.atlas_rects = {}
+        # GPU texture of the atlas when using the SDL2 renderer
+        self.atlas_texture = None
+        self.renderer = None
 
         # Initialize pygame
         self._init_pygame()
@@ -63,23 +93,40 @@ class DuckGUI:
 
             logger.info(f"Display size: {self.screen_width}x{self.screen_height}")
 
+            size = (self.screen_width, self.screen_height) if self.fullscreen else (800, 480)  # Default 7" screen resolution
+
             # Set up display
-            if self.fullscreen:
-                self.screen = pygame.display.set_mode(
-                    (self.screen_width, self.screen_height),
-                    pygame.FULLSCREEN
+            if USE_SDL2_RENDERER and sdl2_video is not None:
+                self.window = sdl2_video.Window(
+                    "Debug Duck", size=size, fullscreen_desktop=self.fullscreen
                 )
+                self.renderer = sdl2_video.Renderer(self.window, accelerated=1, vsync=True)
+                self.screen = None
+                self.screen_rect = pygame.Rect((0, 0), self.window.size)
+                logger.info("Using SDL2 hardware renderer")
             else:
-                self.screen = pygame.display.set_mode(
-                    (800, 480)  # Default 7" screen resolution
-                )
+                if self.fullscreen:
+                    try:
+                        # SCALED lets SDL take the display directly and page
+                        # flip on vsync rather than going through the
+                        # compositor every frame
+                        self.screen = pygame.display.set_mode(
+                            size, pygame.FULLSCREEN | pygame.SCALED, vsync=1
+                        )
+                    except (pygame.error, TypeError) as e:
+                        # vsync needs pygame 2 and a driver that supports it
+                        logger.warning(f"vsync unavailable ({e}), using plain fullscreen")
+                        self.screen = pygame.display.set_mode(size, pygame.FULLSCREEN)
+                else:
+                    self.screen = pygame.display.set_mode(size)
+                self.screen_rect = self.screen.get_rect()
 
-            pygame.display.set_caption("Debug Duck")
+                pygame.display.set_caption("Debug Duck")
 
             # Hide mouse cursor
             pygame.mouse.set_visible(False)
 
-            # Load duck images
+            # Load duck images (after set_mode, which convert_alpha needs)
             self._load_duck_images()
 
             logger.info("✅ Pygame initialized successfully")
@@ -94,18 +141,31 @@ class DuckGUI:
         # You can add different images for each emotion later
         emotions = ["neutral", "concerned", "listening", "happy"]
 
+        # Emotions without their own image share the neutral one; decode,
+        # convert and scale each file only once
+        loaded = {}
+
         for emotion in emotions:
             try:
                 # Try to load specific emotion image
                 image_path = f"assets/animations/duck_{emotion}.png"
-                if os.path.exists(image_path):
-                    image = pygame.image.load(image_path)
-                else:
+                if not os.path.exists(image_path):
                     # Fall back to neutral image
-                    image = pygame.image.load(DUCK_IMAGE_PATH)
+                    image_path = DUCK_IMAGE_PATH
+
+                image = loaded.get(image_path)
+                if image is None:
+                    image = pygame.image.load(image_path)
 
-                # Scale image to fit screen (maintain aspect ratio)
-                image = self._scale_image(image, 400, 400)
+                    # Match the display's pixel format once here so blits don't
+                    # convert every pixel on every frame (needs set_mode first;
+                    # the renderer path uploads to textures instead)
+                    if self.renderer is None:
+                        image = image.convert_alpha()
+
+                    # Scale image to fit screen (maintain aspect ratio)
+                    image = self._scale_image(image, 400, 400)
+                    loaded[image_path] = image
 
                 self.duck_images[emotion] = image
                 logger.debug(f"Loaded image for emotion: {emotion}")
@@ -115,52 +175,111 @@ class DuckGUI:
 
                 # Create placeholder surface
                 self.duck_images[emotion] = pygame.Surface((400, 400))
+                if self.renderer is None:
+                    self.duck_images[emotion] = self.duck_images[emotion].convert()
                 self.duck_images[emotion].fill((255, 200, 100))  # Duck yellow color
 
+            # Bake the centred position so _draw does no layout work
+            self.duck_rects[emotion] = self.duck_images[emotion].get_rect(
+                center=self.screen_rect.center
+            )
+
+        self._build_atlas(emotions)
+
         logger.info(f"Loaded {len(self.duck_images)} duck images")
 
+    def _build_atlas(self, emotions):
+        """Pack the loaded duck images into a single atlas surface"""
+        # Images keep their aspect ratio, so cells are sized to the largest
+        cell_width = max(self.duck_images[e].get_width() for e in emotions)
+        cell_height = max(self.duck_images[e].get_height() for e in emotions)
+
+        self.atlas = pygame.Surface(
+            (cell_width * len(emotions), cell_height), flags=pygame.SRCALPHA
+        )
+        if self.renderer is None:
+            self.atlas = self.atlas.convert_alpha()
+
+        for i, emotion in enumerate(emotions):
+            image = self.duck_images[emotion]
+            self.atlas_rects[emotion] = self.atlas.blit(image, (i * cell_width, 0))
+
+        if self.renderer is not None:
+            self.atlas_texture = sdl2_video.Texture.from_surface(self.renderer, self.atlas)
+
     def _scale_image(self, image, max_width, max_height):
         """Scale image to fit within max dimensions while maintaining aspect ratio"""
         image_rect = image.get_rect()
         scale_factor = min(max_width / image_rect.width, max_height / image_rect.height)
         new_width = int(image_rect.width * scale_factor)
         new_height = int(image_rect.height * scale_factor)
-        return pygame.transform.scale(image, (new_width, new_height))
+        # One-off cost at load, so use the better-looking filter
+        return pygame.transform.smoothscale(image, (new_width, new_height))
 
-    def set_emotion(self, emotion):
+    def set_emotion(self, emotion, duration=None):
         """
-        Change the duck's displayed emotion
+        Change the duck's displayed emotion (returns immediately)
 
         Args:
             emotion (str): Emotion to display (neutral, concerned, listening, happy)
+            duration (float): If given, go back to neutral after this many
+                seconds unless another emotion is set first
         """
-        if emotion in self.duck_images:
-            self.current_emotion = emotion
-            logger.info(f"Duck emotion changed to: {emotion}")
-        else:
+        if emotion not in self.atlas_rects:
             logger.warning(f"Unknown emotion: {emotion}, falling back to neutral")
-            self.current_emotion = "neutral"
-
-    def _draw(self):
-        """Draw the current duck image on screen"""
-        # Fill background with a solid color
-        self.screen.fill((50, 50, 70))  # Dark blue-gray background
+            emotion = "neutral"
+        else:
+            logger.info(f"Duck emotion changed to: {emotion}")
 
-        # Get current duck image
-        duck_image = self.duck_images.get(self.current_emotion, self.duck_images["neutral"])
+        with self._emotion_lock:
+            self._revert_at = time.monotonic() + duration if duration is not None else None
+            if emotion != self.current_emotion:
+                self.current_emotion = emotion
+                self._dirty = True
 
-        # Center the image
-        duck_rect = duck_image.get_rect()
-        duck_rect.center = (self.screen_width // 2, self.screen_height // 2)
+    def _check_revert(self):
+        """Go back to neutral if a timed emotion has expired (GUI loop)"""
+        if self._revert_at is None:
+            return
+        with self._emotion_lock:
+            if self._revert_at is not None and time.monotonic() >= self._revert_at:
+                self._revert_at = None
+                if self.current_emotion != "neutral":
+                    self.current_emotion = "neutral"
+                    self._dirty = True
 
-        # Draw the duck
-        self.screen.blit(duck_image, duck_rect)
+    def _draw(self):
+        """Draw the current duck image on screen, if it has changed"""
+        if not self._dirty:
+            return
+        self._dirty = False
+
+        # Get the current duck's cell in the atlas and its precomputed, centred rect
+        emotion = self.current_emotion if self.current_emotion in self.atlas_rects else "neutral"
+        atlas_rect = self.atlas_rects[emotion]
+        duck_rect = self.duck_rects[emotion]
+
+        if self.renderer is not None:
+            # The GPU recomposes the whole frame; no dirty-rect bookkeeping
+            self.renderer.draw_color = BACKGROUND_COLOR + (255,)
+            self.renderer.clear()
+            self.atlas_texture.draw(srcrect=atlas_rect, dstrect=duck_rect)
+            self.renderer.present()
+        elif self._prev_rect is None:
+            # First frame (or the window was exposed): paint everything
+            self.screen.fill(BACKGROUND_COLOR)
+            self.screen.blit(self.atlas, duck_rect, area=atlas_rect)
+            pygame.display.flip()
+        else:
+            # Clear only where the old duck was, then push just those pixels
+            self.screen.fill(BACKGROUND_COLOR, self._prev_rect)
+            self.screen.blit(self.atlas, duck_rect, area=atlas_rect)
+            pygame.display.update([self._prev_rect, duck_rect])
 
-        # Update display
-        pygame.display.flip()
+        self._prev_rect = duck_rect
 
     def _run_loop(self):
-        """Main GUI loop (runs in background thread)"""
+        """Main GUI loop (runs on the main thread, see run_blocking)"""
         logger.info("Duck GUI started")
 
         try:
@@ -170,26 +289,36 @@ class DuckGUI:
             clock = None
 
         try:
-            while self.running:
+            while not self._stop_event.is_set():
                 # Handle events
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
-                        self.running = False
+                        self._request_stop()
                     elif event.type == pygame.KEYDOWN:
                         if event.key == pygame.K_q or event.key == pygame.K_ESCAPE:
-                            self.running = False
+                            self._request_stop()
                     elif event.type == pygame.MOUSEBUTTONDOWN:
                         # Touchscreen tap
                         logger.info("Screen tapped")
+                    elif event.type == pygame.VIDEOEXPOSE:
+                        # Window contents were lost; repaint all of it
+                        self._prev_rect = None
+                        self._dirty = True
+
+                self._check_revert()
+
+                # Run at full rate only while there's a frame to draw
+                fps = ACTIVE_FPS if self._dirty else IDLE_FPS
 
                 # Draw frame
                 self._draw()
 
-                # Cap frame rate
+                # Cap frame rate. With vsync the flip already paces redraws;
+                # the tick still matters while idle, when nothing is flipped.
                 if clock:
-                    clock.tick(30)  # 30 FPS
+                    clock.tick(fps)
                 else:
-                    time.sleep(1/30)  # Fallback to 30 FPS with time.sleep
+                    self._stop_event.wait(1 / fps)  # Fallback, wakes early on stop
 
         except Exception as e:
             logger.error(f"Error in GUI loop: {e}")
@@ -198,33 +327,37 @@ class DuckGUI:
             pygame.quit()
             logger.info("Duck GUI stopped")
 
+    def _request_stop(self):
+        """Ask the GUI loop to exit"""
+        self.running = False
+        self._stop_event.set()
+
     def start(self):
-        """Start the GUI (runs in background thread)"""
+        """
+        Kept for compatibility; does nothing. SDL isn't safe off the main
+        thread, so the loop is driven by run_blocking() instead.
+        """
+        return True
+
+    def run_blocking(self):
+        """Run the GUI on the calling thread (the main thread) until stopped"""
         if self.running:
             logger.warning("Duck GUI already running")
-            return False
+            return
 
         self.running = True
-        self.thread = threading.Thread(target=self._run_loop, daemon=True)
-        self.thread.start()
-
-        logger.info("✅ Duck GUI started in background thread")
-        return True
+        self._stop_event.clear()
+        self._run_loop()
+        self.running = False
 
     def stop(self):
-        """Stop the GUI"""
+        """Stop the GUI (safe to call from any thread)"""
         if not self.running:
             logger.warning("Duck GUI not running")
             return
 
         logger.info("Stopping Duck GUI...")
-        self.running = False
-
-        # Wait for thread to finish
-        if self.thread:
-            self.thread.join(timeout=5)
-
-        logger.info("✅ Duck GUI stopped")
+        self._request_stop()
 
 
 # Test the GUI
@@ -236,25 +369,27 @@ if __name__ == "__main__":
     # Create GUI
     gui = DuckGUI(fullscreen=True)
 
-    # Start GUI
-    if gui.start():
-        print("GUI is running...")
-        print("Testing emotion changes...")
-
+    def cycle_emotions():
         # Cycle through emotions
         emotions = ["neutral", "concerned", "listening", "happy"]
 
-        try:
-            for i in range(3):  # Cycle 3 times
-                for emotion in emotions:
-                    print(f"Setting emotion: {emotion}")
-                    gui.set_emotion(emotion)
-                    time.sleep(2)
-
-        except KeyboardInterrupt:
-            print("\n\nStopping...")
+        for i in range(3):  # Cycle 3 times
+            for emotion in emotions:
+                print(f"Setting emotion: {emotion}")
+                gui.set_emotion(emotion)
+                time.sleep(2)
 
         gui.stop()
-        print("Test complete!")
-    else:
-        print("Failed to start GUI")
+
+    print("GUI is running...")
+    print("Testing emotion changes...")
+
+    # Emotions change from a worker thread; pygame keeps the main thread
+    threading.Thread(target=cycle_emotions, daemon=True).start()
+
+    try:
+        gui.run_blocking()
+    except KeyboardInterrupt:
+        print("\n\nStopping...")
+
+    print("Test complete!")
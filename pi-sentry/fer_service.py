@@ -6,13 +6,22 @@ Triggers empathy response when frustration is detected
 
 import cv2
 import numpy as np
-import tensorflow.lite as tflite
+# The standalone TFLite runtime is far lighter than full TensorFlow (which
+# is still used if it's all that's installed, e.g. on a dev machine)
+try:
+    from tflite_runtime.interpreter import Interpreter, load_delegate
+except ImportError:
+    import tensorflow.lite as tflite
+    Interpreter = tflite.Interpreter
+    load_delegate = tflite.experimental.load_delegate
 from picamera2 import Picamera2
 import time
 import os
 import requests
 from dotenv import load_dotenv
 import logging
+import multiprocessing
+import queue
 import threading
 
 # Set up logging
@@ -27,40 +36,98 @@ load_dotenv()
 
 # Configuration
 EMOTION_MODEL_PATH = os.environ.get("EMOTION_MODEL_PATH", "assets/emotion-model.tflite")
+# Full-integer (int8) build of the same model, used instead when present.
+# Produce it offline with TFLiteConverter, a representative set of face
+# crops and TFLITE_BUILTINS_INT8; the float model remains the fallback.
+EMOTION_MODEL_INT8_PATH = os.environ.get("EMOTION_MODEL_INT8_PATH", "assets/emotion-model-int8.tflite")
 FACE_CASCADE_PATH = os.environ.get("FACE_CASCADE_PATH", "haarcascade_frontalface_default.xml")
+# YuNet face detector (OpenCV DNN, NEON-vectorised); the Haar cascade is
+# used if this model file or cv2.FaceDetectorYN isn't available
+FACE_DETECTOR_MODEL_PATH = os.environ.get("FACE_DETECTOR_MODEL_PATH", "assets/face_detection_yunet_2023mar.onnx")
+FACE_SCORE_THRESHOLD = float(os.environ.get("FER_FACE_SCORE_THRESHOLD", 0.6))
+# Faces are found on a frame scaled by this factor, then cropped from the
+# full-resolution frame; detection cost scales with the pixel count
+FER_DETECT_SCALE = float(os.environ.get("FER_DETECT_SCALE", 0.5))
+# Between full detections the last face is followed with a template match
+# within FER_TRACK_MARGIN pixels of where it was; full detection runs again
+# every FER_TRACK_FRAMES frames, or as soon as the match score drops
+FER_TRACK_FRAMES = int(os.environ.get("FER_TRACK_FRAMES", 10))
+FER_TRACK_MARGIN = int(os.environ.get("FER_TRACK_MARGIN", 20))
+FER_TRACK_MIN_SCORE = float(os.environ.get("FER_TRACK_MIN_SCORE", 0.6))
 FRUSTRATION_THRESHOLD = int(os.environ.get("FER_FRUSTRATION_THRESHOLD", 100))
-FRAME_SKIP = int(os.environ.get("FER_FRAME_SKIP", 2))
+# Camera resolution. Frames are captured as YUV420 (I420): the first
+# CAMERA_HEIGHT rows are the Y plane, i.e. already a grayscale image.
+CAMERA_WIDTH = 640
+CAMERA_HEIGHT = 480
+# Camera frame rate; capture_array blocks until the next frame, so this is
+# also the analysis rate (no skipped frames are captured and thrown away)
+FER_FRAME_RATE = float(os.environ.get("FER_FRAME_RATE", 5))
 CONFIDENCE_THRESHOLD = float(os.environ.get("FER_CONFIDENCE_THRESHOLD", 0.2))  # Lowered to 0.2 for debugging
+# TFLite's default XNNPACK kernels use NEON; let them use every core
+FER_NUM_THREADS = int(os.environ.get("FER_NUM_THREADS", os.cpu_count() or 1))
+# Set to "true" with a Coral USB accelerator and an Edge TPU compiled model
+FER_USE_EDGETPU = os.environ.get("FER_USE_EDGETPU", "false").lower() == "true"
 
 # Emotions list
 EMOTIONS = ["angry", "disgust", "fear", "happy", "neutral", "sad", "surprise"]
 
 # Emotions that indicate frustration
-FRUSTRATION_EMOTIONS = ["angry", "disgust", "sad"]
+FRUSTRATION_EMOTIONS = frozenset(["angry", "disgust", "sad"])
+
+# Per-emotion change to the frustration counter: frustration builds it up
+# one frame at a time, anything else lets it decay twice as fast
+FRUSTRATION_DELTA = {e: (1 if e in FRUSTRATION_EMOTIONS else -2) for e in EMOTIONS}
+
+# Camera capture and inference run in a separate process so they don't
+# compete with the GUI and Flask threads for the GIL. The worker posts one
+# message per frame (an emotion, or None) plus these control messages.
+FER_WORKER_START_TIMEOUT = float(os.environ.get("FER_WORKER_START_TIMEOUT", 30))
+_WORKER_READY = "__ready__"
+_WORKER_FAILED = "__failed__"
+_WORKER_STOPPED = "__stopped__"
+
+# Forked rather than spawned: spawning would re-import main.py (pygame,
+# Flask, the LLM router) in the child. FER is started before the other
+# service threads exist, and the child never touches pygame.
+_mp = multiprocessing.get_context("fork")
 
 
 class FERService:
     """
     Facial Emotion Recognition Service
     Runs in background, monitors for frustration, triggers empathy endpoint
+
+    The camera and models live in a worker process (see _fer_worker); this
+    object tracks the frustration counter and fires the callbacks.
     """
 
-    def __init__(self, empathy_callback=None):
+    def __init__(self, empathy_callback=None, prefetch_callback=None):
         """
         Initialize FER Service
 
         Args:
             empathy_callback: Function to call when frustration is detected
+            prefetch_callback: Function to call (must not block) once
+                frustration is halfway to the threshold, so the empathy
+                response can be prepared ahead of time
         """
         self.empathy_callback = empathy_callback
+        self.prefetch_callback = prefetch_callback
         self.running = False
+        # Set by stop(); the worker exits as soon as the current frame is done
+        self._stop_event = _mp.Event()
+        self._emotion_queue = None
+        self.process = None
         self.frustration_counter = 0
         self.thread = None
 
-        # Load models
-        self._load_models()
+        # Face tracking state: last face box, its grayscale patch, and how
+        # many frames it has been tracked since the detector last ran
+        self._last_face = None
+        self._face_template = None
+        self._frames_since_detect = 0
 
-        # Initialize camera
+        # Models and camera are loaded in the worker process
         self.picam2 = None
 
         logger.info("FER Service initialized")
@@ -69,7 +136,22 @@ class FERService:
         """Load TFLite emotion model and face detection cascade"""
         try:
             # Load TFLite model
-            self.interpreter = tflite.Interpreter(model_path=EMOTION_MODEL_PATH)
+            delegates = []
+            if FER_USE_EDGETPU:
+                try:
+                    delegates.append(load_delegate('libedgetpu.so.1'))
+                    logger.info("Using Edge TPU delegate")
+                except Exception as e:
+                    logger.warning(f"Edge TPU delegate unavailable, using CPU: {e}")
+            model_path = EMOTION_MODEL_PATH
+            if os.path.exists(EMOTION_MODEL_INT8_PATH):
+                model_path = EMOTION_MODEL_INT8_PATH
+                logger.info("Using int8 emotion model")
+            self.interpreter = Interpreter(
+                model_path=model_path,
+                num_threads=FER_NUM_THREADS,
+                experimental_delegates=delegates or None
+            )
             self.interpreter.allocate_tensors()
             self.input_details = self.interpreter.get_input_details()
             self.output_details = self.interpreter.get_output_details()
@@ -79,14 +161,53 @@ class FERService:
             self.img_height = input_shape[1]
             self.img_width = input_shape[2]
 
-            logger.info(f"Emotion model loaded. Input shape: {self.img_width}x{self.img_height}")
+            # The face is resized into _resize_buf and scaled straight into
+            # the interpreter's own input tensor (via tensor(), no
+            # set_tensor copy). A quantized (uint8, scale 1/255, zero point
+            # 0) model takes raw pixels, so the face is resized into it.
+            input_dtype = self.input_details[0]['dtype']
+            scale, zero_point = self.input_details[0].get('quantization', (0.0, 0))
+            self._raw_pixel_input = (
+                input_dtype == np.uint8
+                and zero_point == 0
+                and abs(scale * 255.0 - 1.0) < 1e-3
+            )
+            # Other integer inputs are quantized as q = x / scale + zero_point,
+            # with the /255 normalisation folded into the scale
+            self._quantized_input = (
+                not self._raw_pixel_input and input_dtype in (np.int8, np.uint8)
+            )
+            if self._quantized_input:
+                self._quant_scale = 1.0 / (255.0 * scale)
+                self._quant_zero_point = zero_point
+                self._quant_range = (np.iinfo(input_dtype).min, np.iinfo(input_dtype).max)
+                self._quant_buf = np.empty((self.img_height, self.img_width, 3), dtype=np.float32)
+            self._input_tensor = self.interpreter.tensor(self.input_details[0]['index'])
+            self._resize_buf = np.empty((self.img_height, self.img_width, 3), dtype=np.uint8)
+
+            # Integer outputs are dequantized so the confidence threshold
+            # still applies to probabilities
+            output_scale, output_zero_point = self.output_details[0].get('quantization', (0.0, 0))
+            self._output_quantization = None
+            if self.output_details[0]['dtype'] in (np.int8, np.uint8) and output_scale:
+                self._output_quantization = (output_scale, output_zero_point)
 
-            # Load face detection cascade
-            self.face_cascade = cv2.CascadeClassifier(FACE_CASCADE_PATH)
-            if self.face_cascade.empty():
-                raise Exception(f"Failed to load cascade from {FACE_CASCADE_PATH}")
+            logger.info(f"Emotion model loaded. Input shape: {self.img_width}x{self.img_height}")
 
-            logger.info("Face detection model loaded")
+            # Load face detector: YuNet if we have it, else the Haar cascade
+            self.face_detector = None
+            self.face_cascade = None
+            self._detector_size = None
+            if hasattr(cv2, "FaceDetectorYN") and os.path.exists(FACE_DETECTOR_MODEL_PATH):
+                self.face_detector = cv2.FaceDetectorYN.create(
+                    FACE_DETECTOR_MODEL_PATH, "", (640, 480), score_threshold=FACE_SCORE_THRESHOLD
+                )
+                logger.info("Face detection model loaded (YuNet)")
+            else:
+                self.face_cascade = cv2.CascadeClassifier(FACE_CASCADE_PATH)
+                if self.face_cascade.empty():
+                    raise Exception(f"Failed to load cascade from {FACE_CASCADE_PATH}")
+                logger.info("Face detection model loaded (Haar cascade)")
 
         except Exception as e:
             logger.error(f"Error loading models: {e}")
@@ -97,9 +218,12 @@ class FERService:
         try:
             self.picam2 = Picamera2()
 
-            # Configure for video capture (default RGBA format)
+            # Configure for video capture at the rate we actually want to
+            # analyse frames. YUV420 gives detection a grayscale plane for
+            # free; only the face crop is ever converted to colour.
             config = self.picam2.create_preview_configuration(
-                main={"size": (640, 480)}
+                main={"size": (CAMERA_WIDTH, CAMERA_HEIGHT), "format": "YUV420"},
+                controls={"FrameRate": FER_FRAME_RATE}
             )
             self.picam2.configure(config)
 
@@ -116,108 +240,255 @@ class FERService:
             logger.error(f"❌ Error initializing camera: {e}")
             return False
 
-    def detect_emotion(self, frame_bgr):
+    def _detect_faces(self, gray_frame):
         """
-        Detect emotion in a single frame
-
-        Args:
-            frame_bgr: Frame in BGR format
+        Find faces in a grayscale frame
 
         Returns:
-            str: Detected emotion, or None if no face found
+            list: (x, y, w, h) integer boxes clipped to the frame
         """
-        # Convert to grayscale
-        gray_frame = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
-
-        # Detect faces
-        faces = self.face_cascade.detectMultiScale(
-            gray_frame,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
+        frame_h, frame_w = gray_frame.shape[:2]
 
-        if len(faces) == 0:
-            logger.debug("No face detected in frame")
+        scale = FER_DETECT_SCALE
+        if scale != 1.0:
+            small = cv2.resize(gray_frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            small = gray_frame
+        small_h, small_w = small.shape[:2]
+
+        if self.face_detector is not None:
+            # YuNet wants three channels; expanding the downscaled frame is
+            # much cheaper than converting the full frame to colour
+            if self._detector_size != (small_w, small_h):
+                self.face_detector.setInputSize((small_w, small_h))
+                self._detector_size = (small_w, small_h)
+            _, detections = self.face_detector.detect(cv2.cvtColor(small, cv2.COLOR_GRAY2BGR))
+            found = [] if detections is None else [det[:4] for det in detections]
+        else:
+            # Detect faces (minSize scaled so it's still ~30px at full size)
+            min_side = max(1, int(round(30 * scale)))
+            found = self.face_cascade.detectMultiScale(
+                small,
+                scaleFactor=1.1,
+                minNeighbors=5,
+                minSize=(min_side, min_side)
+            )
+
+        # Map the boxes back onto the full-resolution frame
+        boxes = []
+        for box in found:
+            x, y, w, h = (int(round(v / scale)) for v in box)
+            x, y = max(x, 0), max(y, 0)
+            w, h = min(w, frame_w - x), min(h, frame_h - y)
+            if w > 0 and h > 0:
+                boxes.append((x, y, w, h))
+        return boxes
+
+    def _track_face(self, gray_frame):
+        """
+        Follow the last detected face with a template match near where it was
+
+        Returns:
+            tuple: (x, y, w, h) box, or None if the face can't be followed
+        """
+        x, y, w, h = self._last_face
+        frame_h, frame_w = gray_frame.shape[:2]
+
+        left, top = max(x - FER_TRACK_MARGIN, 0), max(y - FER_TRACK_MARGIN, 0)
+        right = min(x + w + FER_TRACK_MARGIN, frame_w)
+        bottom = min(y + h + FER_TRACK_MARGIN, frame_h)
+        window = gray_frame[top:bottom, left:right]
+
+        scores = cv2.matchTemplate(window, self._face_template, cv2.TM_CCOEFF_NORMED)
+        _, best_score, _, (best_x, best_y) = cv2.minMaxLoc(scores)
+        if best_score < FER_TRACK_MIN_SCORE:
+            logger.debug(f"Face track lost (score {best_score:.2f})")
             return None
 
-        logger.debug(f"✓ Face detected (x={faces[0][0]}, y={faces[0][1]}, w={faces[0][2]}, h={faces[0][3]})")
+        return (left + best_x, top + best_y, w, h)
+
+    def _find_face(self, gray_frame):
+        """
+        Locate the face to analyse, tracking the previous one when possible
 
-        # Process first face only
-        (x, y, w, h) = faces[0]
+        Returns:
+            tuple: (x, y, w, h) box, or None if no face found
+        """
+        face = None
+        if self._last_face is not None and self._frames_since_detect < FER_TRACK_FRAMES:
+            face = self._track_face(gray_frame)
+            self._frames_since_detect += 1
+
+        if face is None:
+            faces = self._detect_faces(gray_frame)
+            if len(faces) == 0:
+                self._last_face = None
+                return None
+
+            # Process first face only
+            face = faces[0]
+            x, y, w, h = face
+            # Copy so the template doesn't keep the whole frame alive
+            self._face_template = gray_frame[y:y+h, x:x+w].copy()
+            self._frames_since_detect = 0
+
+        self._last_face = face
+        return face
+
+    def _face_bgr(self, frame_yuv, box):
+        """
+        Convert just the face region of an I420 frame to BGR
 
-        # Extract face region from BGR frame (color, not grayscale!)
-        face_roi_bgr = frame_bgr[y:y+h, x:x+w]
+        Returns:
+            numpy.ndarray: BGR crop (the box rounded to even coordinates)
+        """
+        x, y, w, h = box
+        # Chroma is subsampled 2x2, and the I420 layout of an h-row crop
+        # packs each chroma plane into h/4 rows, so align accordingly
+        w, h = max(2, w & ~1), max(4, h & ~3)
+        x = min(x & ~1, CAMERA_WIDTH - w)
+        y = min(y & ~1, CAMERA_HEIGHT - h)
+
+        # U and V planes follow the Y plane, each a quarter of its size
+        u_plane = frame_yuv[CAMERA_HEIGHT:CAMERA_HEIGHT * 5 // 4].reshape(CAMERA_HEIGHT // 2, CAMERA_WIDTH // 2)
+        v_plane = frame_yuv[CAMERA_HEIGHT * 5 // 4:CAMERA_HEIGHT * 3 // 2].reshape(CAMERA_HEIGHT // 2, CAMERA_WIDTH // 2)
+        cx, cy, cw, ch = x // 2, y // 2, w // 2, h // 2
+
+        crop = np.vstack((
+            frame_yuv[y:y+h, x:x+w],
+            u_plane[cy:cy+ch, cx:cx+cw].reshape(h // 4, w),
+            v_plane[cy:cy+ch, cx:cx+cw].reshape(h // 4, w),
+        ))
+        return cv2.cvtColor(crop, cv2.COLOR_YUV2BGR_I420)
+
+    def _predict(self, face_bgr):
+        """
+        Run the emotion model on a face crop (FER worker process only; the
+        models are never loaded in the parent)
 
-        # Preprocess for FER model
-        roi_resized = cv2.resize(face_roi_bgr, (self.img_width, self.img_height))
-        roi_normalized = roi_resized.astype('float32') / 255.0
-        roi_final = np.expand_dims(roi_normalized, axis=0)
-        # Note: No second expand_dims needed for color images
+        Args:
+            face_bgr: BGR face crop, any size
+
+        Returns:
+            numpy.ndarray: Probability for each entry in EMOTIONS
+        """
+        # Preprocess for FER model directly into the input tensor
+        model_input = self._input_tensor()[0]
+        if self._raw_pixel_input:
+            cv2.resize(face_bgr, (self.img_width, self.img_height), dst=model_input)
+        elif self._quantized_input:
+            cv2.resize(face_bgr, (self.img_width, self.img_height), dst=self._resize_buf)
+            quant_buf = self._quant_buf
+            np.multiply(self._resize_buf, self._quant_scale, out=quant_buf, casting='unsafe')
+            np.add(quant_buf, self._quant_zero_point, out=quant_buf)
+            np.rint(quant_buf, out=quant_buf)
+            np.clip(quant_buf, *self._quant_range, out=quant_buf)
+            model_input[...] = quant_buf
+        else:
+            cv2.resize(face_bgr, (self.img_width, self.img_height), dst=self._resize_buf)
+            # Normalise to [0, 1] in one pass, written straight into the input
+            np.multiply(self._resize_buf, 1.0 / 255.0, out=model_input, casting='unsafe')
+        # invoke() refuses to run while a view into the interpreter is alive
+        del model_input
 
         # Run inference
-        self.interpreter.set_tensor(self.input_details[0]['index'], roi_final)
         self.interpreter.invoke()
 
-        # Get prediction
+        # Get prediction (get_tensor returns a copy)
         predictions = self.interpreter.get_tensor(self.output_details[0]['index'])[0]
 
+        if self._output_quantization is not None:
+            output_scale, output_zero_point = self._output_quantization
+            predictions = (predictions.astype(np.float32) - output_zero_point) * output_scale
+        return predictions
+
+    def detect_emotion(self, frame_yuv):
+        """
+        Detect emotion in a single frame
+
+        Args:
+            frame_yuv: YUV420 (I420) frame from the camera
+
+        Returns:
+            str: Detected emotion, or None if no face found
+        """
+        # Detect (or track) the face
+        # The Y plane is the grayscale image
+        face = self._find_face(frame_yuv[:CAMERA_HEIGHT])
+
+        if face is None:
+            logger.debug("No face detected in frame")
+            return None
+
+        (x, y, w, h) = face
+        logger.debug("✓ Face detected (x=%d, y=%d, w=%d, h=%d)", x, y, w, h)
+
+        # Extract face region in BGR (color, not grayscale!); only this
+        # crop is converted from YUV
+        face_roi_bgr = self._face_bgr(frame_yuv, face)
+
+        # Run the emotion model on the crop
+        predictions = self._predict(face_roi_bgr)
+
         # Get dominant emotion
         emotion_index = np.argmax(predictions)
         confidence = np.max(predictions)
         emotion = EMOTIONS[emotion_index]
 
         # Debug: Show all emotion scores
-        scores_str = ", ".join([f"{EMOTIONS[i]}: {predictions[i]:.3f}" for i in range(len(EMOTIONS))])
-        logger.debug(f"All scores: [{scores_str}]")
-        logger.debug(f"Prediction: {emotion} (confidence: {confidence:.2f})")
+        # (per-frame, so only build the strings when DEBUG is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            scores_str = ", ".join([f"{EMOTIONS[i]}: {predictions[i]:.3f}" for i in range(len(EMOTIONS))])
+            logger.debug(f"All scores: [{scores_str}]")
+            logger.debug(f"Prediction: {emotion} (confidence: {confidence:.2f})")
 
         # Only return if confidence is above threshold
         if confidence >= CONFIDENCE_THRESHOLD:
             return emotion
         else:
-            logger.debug(f"⚠ Confidence too low ({confidence:.2f} < {CONFIDENCE_THRESHOLD})")
+            logger.debug("⚠ Confidence too low (%.2f < %s)", confidence, CONFIDENCE_THRESHOLD)
             return None
 
     def _monitor_loop(self):
-        """Main monitoring loop (runs in background thread)"""
+        """Read emotions from the worker and track frustration (background thread)"""
         logger.info("FER monitoring started")
 
         frame_count = 0
         last_status_time = time.time()
 
         try:
-            while self.running:
-                # Capture frame (returns RGBA array)
-                frame = self.picam2.capture_array()
-
-                # Convert RGBA to BGR
-                frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR)
-
-                # Skip frames for performance
-                if frame_count % FRAME_SKIP == 0:
-                    logger.debug(f"🔍 Processing frame {frame_count}, shape: {frame.shape}")
-                    emotion = self.detect_emotion(frame_bgr)
-                    logger.debug(f"🔍 Detection result: {emotion}")
-
-                    if emotion:
-                        logger.info(f"✅ Detected emotion: {emotion}")
-
-                        # Check if emotion indicates frustration
-                        if emotion in FRUSTRATION_EMOTIONS:
-                            self.frustration_counter += 1
-                            logger.info(f"Frustration detected ({self.frustration_counter}/{FRUSTRATION_THRESHOLD})")
-
-                            # Trigger empathy if threshold reached
-                            if self.frustration_counter >= FRUSTRATION_THRESHOLD:
-                                logger.warning("🔥 FRUSTRATION THRESHOLD REACHED!")
-                                self._trigger_empathy()
-                                # Reset counter after triggering
-                                self.frustration_counter = 0
-                        else:
-                            # Reset counter if emotion is not frustration
-                            if self.frustration_counter > 0:
-                                self.frustration_counter = max(0, self.frustration_counter - 2)
+            while True:
+                # One message per analysed frame; blocks until the worker
+                # sends the next one
+                emotion = self._emotion_queue.get()
+                if emotion == _WORKER_STOPPED:
+                    break
+
+                logger.debug("🔍 Detection result for frame %d: %s", frame_count, emotion)
+
+                if emotion:
+                    logger.info(f"✅ Detected emotion: {emotion}")
+
+                    # Update the counter (never below zero) from the delta table
+                    delta = FRUSTRATION_DELTA[emotion]
+                    self.frustration_counter = max(0, self.frustration_counter + delta)
+
+                    if delta > 0:
+                        logger.info(f"Frustration detected ({self.frustration_counter}/{FRUSTRATION_THRESHOLD})")
+
+                        # Halfway there: get the empathy phrase ready
+                        if self.frustration_counter == FRUSTRATION_THRESHOLD // 2 and self.prefetch_callback:
+                            try:
+                                self.prefetch_callback()
+                            except Exception as e:
+                                logger.error(f"Error in prefetch callback: {e}")
+
+                        # Trigger empathy if threshold reached
+                        if self.frustration_counter >= FRUSTRATION_THRESHOLD:
+                            logger.warning("🔥 FRUSTRATION THRESHOLD REACHED!")
+                            self._trigger_empathy()
+                            # Reset counter after triggering
+                            self.frustration_counter = 0
 
                 frame_count += 1
 
@@ -226,9 +497,6 @@ class FERService:
                     logger.info(f"📊 Status: {frame_count} frames processed, frustration counter: {self.frustration_counter}")
                     last_status_time = time.time()
 
-                # Small delay
-                time.sleep(0.1)
-
         except Exception as e:
             logger.error(f"Error in monitoring loop: {e}")
 
@@ -261,9 +529,27 @@ class FERService:
             logger.warning("FER service already running")
             return False
 
-        # Initialize camera
-        if not self._init_camera():
-            logger.error("Failed to initialize camera. FER service not started.")
+        # Start the worker and wait until its models and camera are ready
+        self._stop_event.clear()
+        self._emotion_queue = _mp.Queue()
+        self.process = _mp.Process(
+            target=_fer_worker,
+            args=(self._emotion_queue, self._stop_event),
+            daemon=True
+        )
+        self.process.start()
+
+        try:
+            status = self._emotion_queue.get(timeout=FER_WORKER_START_TIMEOUT)
+        except queue.Empty:
+            status = None
+        if status != _WORKER_READY:
+            logger.error("Failed to initialize camera or models. FER service not started.")
+            self._stop_event.set()
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process = None
             return False
 
         # Start monitoring thread
@@ -282,18 +568,58 @@ class FERService:
 
         logger.info("Stopping FER service...")
         self.running = False
+        self._stop_event.set()
+
+        # Wait for the worker (it stops the camera on the way out)
+        if self.process:
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                logger.warning("FER worker didn't exit, terminating it")
+                self.process.terminate()
 
-        # Wait for thread to finish
+        # Wake the monitoring thread in case the worker couldn't say goodbye
+        self._emotion_queue.put(_WORKER_STOPPED)
         if self.thread:
             self.thread.join(timeout=5)
 
-        # Stop camera
-        if self.picam2:
-            self.picam2.stop()
-
         logger.info("✅ FER Service stopped")
 
 
+def _fer_worker(emotion_queue, stop_event):
+    """
+    FER worker process: owns the camera and models, and posts each frame's
+    emotion (or None) to emotion_queue until stop_event is set
+    """
+    fer = FERService()
+    try:
+        fer._load_models()
+    except Exception:
+        emotion_queue.put(_WORKER_FAILED)
+        return
+
+    if not fer._init_camera():
+        emotion_queue.put(_WORKER_FAILED)
+        return
+
+    emotion_queue.put(_WORKER_READY)
+    logger.info(f"FER worker running (pid {os.getpid()})")
+
+    try:
+        while not stop_event.is_set():
+            # Capture frame (YUV420 array); blocks until the camera
+            # delivers the next one, which paces this loop
+            frame_yuv = fer.picam2.capture_array()
+            emotion_queue.put(fer.detect_emotion(frame_yuv))
+
+    except Exception as e:
+        logger.error(f"Error in FER worker: {e}")
+
+    finally:
+        fer.picam2.stop()
+        emotion_queue.put(_WORKER_STOPPED)
+        logger.info("FER worker stopped")
+
+
 # Test the FER service
 if __name__ == "__main__":
     print("\n=== Testing FER Service ===\n")
@@ -4,10 +4,22 @@ Uses OpenRouter to get comforting phrases for emotional support
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import logging
 
+# orjson is optional; it parses/serialises much faster than stdlib json on ARM
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,6 +36,14 @@ OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
 # Your app URL for OpenRouter identification
 YOUR_APP_URL = "http://github.com/debug-duck/pi-sentry"
 
+# Recent LLM phrases are reused for a while instead of calling the API on
+# every frustration event (the prompt never changes)
+PHRASE_CACHE_SIZE = 20
+PHRASE_CACHE_TTL = float(os.environ.get("LLM_PHRASE_CACHE_TTL", 1800))  # seconds
+# Cached phrases are only reused once there are enough to vary between;
+# until then new ones keep being prefetched in the background
+PHRASE_CACHE_MIN = 3
+
 
 class LLMRouter:
     """
@@ -41,6 +61,22 @@ class LLMRouter:
             "HTTP-Referer": YOUR_APP_URL,
             "Content-Type": "application/json"
         }
+
+        # Keep the TLS connection to OpenRouter open between calls
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+        # A comforting phrase can be fetched ahead of time (see
+        # prefetch_comforting_phrase) so empathy doesn't wait on the LLM
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._phrase_future = None
+        self._phrase_lock = threading.Lock()
+        self._phrase_cache = deque(maxlen=PHRASE_CACHE_SIZE)
+        # Prefetched phrases not said yet (said before any cached ones)
+        self._unspoken = deque()
+        self._last_call = None
+        self._last_phrase = None
         logger.info("LLMRouter initialized successfully")
 
     def _call_openrouter(self, model, messages, max_tokens=150, temperature=0.3):
@@ -64,15 +100,22 @@ class LLMRouter:
                 "temperature": temperature
             }
 
-            response = requests.post(
-                OPENROUTER_API_URL,
-                headers=self.headers,
-                json=payload,
-                timeout=30
-            )
+            if orjson:
+                # Content-Type is already set on the session
+                response = self.session.post(
+                    OPENROUTER_API_URL,
+                    data=orjson.dumps(payload),
+                    timeout=30
+                )
+            else:
+                response = self.session.post(
+                    OPENROUTER_API_URL,
+                    json=payload,
+                    timeout=30
+                )
 
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content) if orjson else response.json()
                 return data['choices'][0]['message']['content']
             else:
                 error_msg = f"OpenRouter API error: {response.status_code} - {response.text}"
@@ -86,6 +129,33 @@ class LLMRouter:
             logger.error(f"Error calling OpenRouter: {e}")
             return None
 
+    def prefetch_comforting_phrase(self):
+        """
+        Start fetching a comforting phrase in the background, so the next
+        get_comforting_phrase() returns without waiting on the LLM. Keeps
+        going (one at a time) until the cache holds PHRASE_CACHE_MIN phrases.
+        Does nothing if a prefetched phrase is already pending.
+        """
+        with self._phrase_lock:
+            if self._phrase_future is not None or self._cache_fresh():
+                return
+            logger.info("Prefetching comforting phrase...")
+            future = self._phrase_future = self._executor.submit(self._fetch_comforting_phrase)
+        # Outside the lock: runs straight away if the fetch already finished
+        future.add_done_callback(self._prefetch_done)
+
+    def _prefetch_done(self, future):
+        """Keep a finished prefetch for later and start the next one if needed"""
+        with self._phrase_lock:
+            if self._phrase_future is not future:
+                return  # get_comforting_phrase() already took it
+            self._phrase_future = None
+            phrase = future.result()
+            if phrase not in self._phrase_cache:
+                return  # the LLM failed (canned fallback); don't retry in a loop
+            self._unspoken.append(phrase)
+        self.prefetch_comforting_phrase()
+
     def get_comforting_phrase(self):
         """
         Phase 1: Calls a creative/roleplay model for an empathetic phrase.
@@ -94,6 +164,44 @@ class LLMRouter:
         Returns:
             str: A comforting phrase from the duck
         """
+        with self._phrase_lock:
+            future, self._phrase_future = self._phrase_future, None
+
+        if future is not None:
+            # Usually finished long ago; otherwise it's still further along
+            # than a new request would be
+            logger.info("Using prefetched comforting phrase")
+            phrase = future.result()
+        else:
+            with self._phrase_lock:
+                if self._unspoken:
+                    self._last_phrase = self._unspoken.popleft()
+                    logger.info(f"Using prefetched comforting phrase: {self._last_phrase}")
+                    return self._last_phrase
+
+                if self._cache_fresh():
+                    # Avoid saying the same thing twice in a row
+                    choices = [p for p in self._phrase_cache if p != self._last_phrase] or list(self._phrase_cache)
+                    self._last_phrase = random.choice(choices)
+                    logger.info(f"Using cached comforting phrase: {self._last_phrase}")
+                    return self._last_phrase
+
+            phrase = self._fetch_comforting_phrase()
+
+        with self._phrase_lock:
+            self._last_phrase = phrase
+        return phrase
+
+    def _cache_fresh(self):
+        """True if recent LLM phrases can be reused (call with _phrase_lock held)"""
+        return (
+            len(self._phrase_cache) >= PHRASE_CACHE_MIN
+            and self._last_call is not None
+            and time.monotonic() - self._last_call < PHRASE_CACHE_TTL
+        )
+
+    def _fetch_comforting_phrase(self):
+        """Ask the LLM for a comforting phrase, with a canned fallback"""
         logger.info("Getting comforting phrase from LLM...")
 
         messages = [
@@ -118,6 +226,9 @@ class LLMRouter:
 
         if response:
             logger.info(f"LLM responded: {response}")
+            with self._phrase_lock:
+                self._phrase_cache.append(response)
+                self._last_call = time.monotonic()
             return response
         else:
             # Fallback phrases if LLM fails
@@ -128,7 +239,6 @@ class LLMRouter:
                 "You're smarter than this bug. Trust yourself!",
                 "Quack! Remember, even the best coders hit walls sometimes."
             ]
-            import random
             fallback = random.choice(fallback_phrases)
             logger.warning(f"LLM failed, using fallback: {fallback}")
             return fallback
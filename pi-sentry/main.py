@@ -9,7 +9,8 @@ import sys
 import time
 import signal
 import logging
-from threading import Thread
+from threading import Event, Thread
+import requests
 from dotenv import load_dotenv
 
 # Import all services
@@ -17,6 +18,7 @@ from duck_gui import DuckGUI
 from fer_service import FERService
 from button_listener import ButtonListener
 import sentry_server
+import tts_service
 
 # Set up logging
 logging.basicConfig(
@@ -31,6 +33,26 @@ load_dotenv()
 # Configuration
 PI_HOST = os.environ.get("PI_HOST", "0.0.0.0")
 PI_PORT = int(os.environ.get("PI_PORT", 5000))
+FLASK_READY_TIMEOUT = 10  # seconds
+
+
+def _wait_ready(url, timeout=FLASK_READY_TIMEOUT):
+    """
+    Poll url until it answers 200 OK
+
+    Returns:
+        bool: True once ready, False if timeout expired first
+    """
+    deadline = time.monotonic() + timeout
+    with requests.Session() as session:
+        while time.monotonic() < deadline:
+            try:
+                if session.get(url, timeout=0.2).ok:
+                    return True
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.1)
+    return False
 
 
 class DebugDuck:
@@ -45,6 +67,9 @@ class DebugDuck:
         self.button = None
         self.flask_thread = None
         self.running = False
+        # Set once shutdown starts; the main thread sleeps on it when
+        # there's no GUI loop to run
+        self._stop_event = Event()
 
         logger.info("=" * 60)
         logger.info("DEBUG DUCK - MAIN APPLICATION")
@@ -54,12 +79,17 @@ class DebugDuck:
         """Callback for when FER detects frustration"""
         logger.info("FER triggered empathy callback")
 
-        # Trigger empathy endpoint
-        import requests
+        # The handler lives in this process, so call it directly rather than
+        # going through Flask; its own thread keeps FER from blocking on
+        # the LLM and TTS
+        Thread(target=self._run_empathy, daemon=True).start()
+
+    def _run_empathy(self):
+        """Run the empathy response (on its own thread)"""
         try:
-            requests.get(f"http://localhost:{PI_PORT}/trigger-empathy", timeout=5)
+            sentry_server.run_empathy()
         except Exception as e:
-            logger.error(f"Error calling empathy endpoint: {e}")
+            logger.error(f"Error during empathy response: {e}")
 
     def _button_callback(self):
         """Callback for when button is pressed"""
@@ -75,23 +105,16 @@ class DebugDuck:
         """Start all services"""
         logger.info("\nStarting services...\n")
 
-        # 1. Start GUI
+        # 1. Set up GUI (its loop runs on the main thread, see run())
         try:
             logger.info("[1/4] Starting Duck GUI...")
             self.gui = DuckGUI(fullscreen=True)
-            if self.gui.start():
-                logger.info("✅ Duck GUI started")
-            else:
-                logger.error("❌ Failed to start Duck GUI")
-                return False
+            logger.info("✅ Duck GUI ready")
         except Exception as e:
             logger.error(f"❌ Error starting GUI: {e}")
             logger.warning("Continuing without GUI...")
             self.gui = None
 
-        # Give GUI time to initialize
-        time.sleep(1)
-
         # 2. Set GUI reference in Flask server
         if self.gui:
             sentry_server.set_gui(self.gui)
@@ -99,8 +122,12 @@ class DebugDuck:
         # 3. Start FER Service
         try:
             logger.info("[2/4] Starting FER Service...")
-            self.fer = FERService(empathy_callback=self._empathy_callback)
+            self.fer = FERService(
+                empathy_callback=self._empathy_callback,
+                prefetch_callback=sentry_server.prefetch_comforting_phrase
+            )
             if self.fer.start():
+                sentry_server.set_fer(self.fer)
                 logger.info("✅ FER Service started")
             else:
                 logger.error("❌ Failed to start FER Service")
@@ -131,24 +158,40 @@ class DebugDuck:
             logger.info("[4/4] Starting Flask Server...")
 
             def run_flask():
-                sentry_server.app.run(
-                    host=PI_HOST,
-                    port=PI_PORT,
-                    debug=False,  # Disable debug mode when running with other services
-                    use_reloader=False  # Disable reloader to avoid thread conflicts
-                )
+                # waitress serves requests from a thread pool, so /status
+                # and /emotion aren't held up while /speak is talking
+                try:
+                    from waitress import serve
+                    logger.info("Serving with waitress")
+                    serve(sentry_server.app, host=PI_HOST, port=PI_PORT, threads=4)
+                except ImportError:
+                    logger.warning("waitress not installed, using Flask's built-in server")
+                    sentry_server.app.run(
+                        host=PI_HOST,
+                        port=PI_PORT,
+                        debug=False,  # Disable debug mode when running with other services
+                        use_reloader=False,  # Disable reloader to avoid thread conflicts
+                        threaded=True
+                    )
 
             self.flask_thread = Thread(target=run_flask, daemon=True)
             self.flask_thread.start()
 
-            # Give Flask time to start
-            time.sleep(2)
+            # Wait until the server actually answers
+            if not _wait_ready(f"http://127.0.0.1:{PI_PORT}/status"):
+                raise RuntimeError("Flask failed to become ready")
 
             logger.info("✅ Flask Server started")
         except Exception as e:
             logger.error(f"❌ Error starting Flask server: {e}")
             return False
 
+        # Warm the phrase cache and load the TTS voice so the first empathy
+        # event doesn't wait on the LLM or Piper (after FER has forked its
+        # worker, which must not inherit the fetch thread or Piper's pipes)
+        sentry_server.prefetch_comforting_phrase()
+        tts_service.prewarm()
+
         logger.info("\n" + "=" * 60)
         logger.info("✅ ALL SERVICES STARTED")
         logger.info("=" * 60)
@@ -171,6 +214,7 @@ class DebugDuck:
         logger.info("=" * 60)
 
         self.running = False
+        self._stop_event.set()
 
         # Stop FER
         if self.fer:
@@ -182,8 +226,8 @@ class DebugDuck:
             logger.info("Stopping Button Listener...")
             self.button.stop()
 
-        # Stop GUI
-        if self.gui:
+        # Stop GUI (already stopped if its window was closed)
+        if self.gui and self.gui.running:
             logger.info("Stopping Duck GUI...")
             self.gui.stop()
 
@@ -203,21 +247,27 @@ class DebugDuck:
 
         # Set up signal handlers for graceful shutdown
         def signal_handler(sig, frame):
-            logger.info("\nReceived shutdown signal...")
-            self.stop_services()
-            sys.exit(0)
+            # Only wake the main thread; teardown happens back in run(),
+            # not inside the handler where any lock might already be held
+            self._stop_event.set()
+            if self.gui:
+                self.gui.stop()  # just sets the GUI loop's stop event
 
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
 
-        # Keep main thread alive
+        # The main thread drives pygame (SDL isn't safe on other threads);
+        # without a GUI it just stays alive for the service threads
         try:
-            while self.running:
-                time.sleep(1)
+            if self.gui:
+                # Returns on a signal, or when the window is closed (Q/Esc)
+                self.gui.run_blocking()
+            else:
+                self._stop_event.wait()
         except KeyboardInterrupt:
             logger.info("\nKeyboard interrupt received...")
-            self.stop_services()
 
+        self.stop_services()
         return 0
 
 
@@ -32,8 +32,15 @@ except Exception as e:
     logger.error(f"Failed to initialize LLM Router: {e}")
     llm_router = None
 
-# Shared GUI reference (will be set by main.py)
+# Shared GUI and FER references (will be set by main.py)
 duck_gui = None
+fer_service = None
+
+
+def prefetch_comforting_phrase():
+    """Warm up the next empathy phrase (called from FER as frustration builds)"""
+    if llm_router:
+        llm_router.prefetch_comforting_phrase()
 
 
 def set_gui(gui):
@@ -43,50 +50,72 @@ def set_gui(gui):
     logger.info("GUI reference set")
 
 
-@app.route('/trigger-empathy', methods=['GET'])
-def trigger_empathy():
+def set_fer(fer):
     """
-    Trigger empathy response when FER detects frustration.
+    Set the FER service reference (called from main.py). Only used for
+    /status: inference runs in FER's worker process, not through this.
+    """
+    global fer_service
+    fer_service = fer
+    logger.info("FER reference set")
+
+
+def run_empathy():
+    """
+    Run the empathy response (no Flask needed, so main.py calls it directly).
 
     Flow:
     1. Get comforting phrase from LLM
     2. Change duck emotion to "concerned"
     3. Speak the phrase
     4. Reset duck emotion to "neutral"
+
+    Returns:
+        dict: {"status": "success", "phrase": ...}
     """
     logger.info("\n" + "=" * 50)
     logger.info("EMPATHY TRIGGERED")
     logger.info("=" * 50)
 
-    try:
-        # Step 1: Get comforting phrase from LLM
-        if llm_router:
-            logger.info("Getting comforting phrase from LLM...")
-            phrase = llm_router.get_comforting_phrase()
-        else:
-            logger.warning("LLM Router not available, using fallback phrase")
-            phrase = "Hey, take a breath. You've got this!"
+    # Step 1: Get comforting phrase from LLM
+    if llm_router:
+        logger.info("Getting comforting phrase from LLM...")
+        phrase = llm_router.get_comforting_phrase()
+    else:
+        logger.warning("LLM Router not available, using fallback phrase")
+        phrase = "Hey, take a breath. You've got this!"
 
-        logger.info(f"Phrase: {phrase}")
+    logger.info(f"Phrase: {phrase}")
 
-        # Step 2: Change duck emotion to "concerned"
-        if duck_gui:
-            duck_gui.set_emotion("concerned")
+    # Refill in the background if the cached phrases are getting stale
+    prefetch_comforting_phrase()
 
-        # Step 3: Speak the phrase
-        logger.info("Speaking phrase...")
-        tts_service.speak(phrase)
+    # Step 2: Change duck emotion to "concerned"
+    if duck_gui:
+        duck_gui.set_emotion("concerned")
 
-        # Step 4: Reset duck emotion to "neutral" (after a delay)
-        if duck_gui:
-            import time
-            time.sleep(1)
-            duck_gui.set_emotion("neutral")
+    # Step 3: Speak the phrase (playback starts before synthesis finishes)
+    logger.info("Speaking phrase...")
+    tts_service.speak_stream(phrase)
 
-        return jsonify({
-            "status": "success",
-            "phrase": phrase
-        }), 200
+    # Step 4: Reset duck emotion to "neutral" (after a delay, handled by
+    # the GUI loop so this doesn't block)
+    if duck_gui:
+        duck_gui.set_emotion("concerned", duration=1.0)
+
+    return {
+        "status": "success",
+        "phrase": phrase
+    }
+
+
+@app.route('/trigger-empathy', methods=['GET'])
+def trigger_empathy():
+    """
+    Trigger empathy response over HTTP (see run_empathy).
+    """
+    try:
+        return jsonify(run_empathy()), 200
 
     except Exception as e:
         error_msg = f"Error during empathy response: {str(e)}"
@@ -128,14 +157,13 @@ def speak():
         if duck_gui:
             duck_gui.set_emotion("listening")
 
-        # Speak the text
-        success = tts_service.speak(text)
+        # Speak the text (playback starts before synthesis finishes)
+        success = tts_service.speak_stream(text)
 
-        # Reset duck emotion to "neutral"
+        # Reset duck emotion to "neutral" (after a delay, handled by the
+        # GUI loop so the request returns straight away)
         if duck_gui:
-            import time
-            time.sleep(0.5)
-            duck_gui.set_emotion("neutral")
+            duck_gui.set_emotion("listening", duration=0.5)
 
         if success:
             return jsonify({
@@ -202,7 +230,8 @@ def status():
         "service": "Debug Duck Pi-Sentry",
         "port": PI_PORT,
         "llm_router": "initialized" if llm_router else "failed",
-        "gui": "initialized" if duck_gui else "not set"
+        "gui": "initialized" if duck_gui else "not set",
+        "fer": "running" if fer_service and fer_service.running else "not running"
     }), 200
 
 
@@ -213,9 +242,20 @@ if __name__ == "__main__":
     logger.info(f"Starting Flask server on {PI_HOST}:{PI_PORT}...")
     logger.info("=" * 60 + "\n")
 
-    # Run Flask app
-    app.run(
-        host=PI_HOST,
-        port=PI_PORT,
-        debug=True
-    )
+    # Warm the phrase cache before the first empathy request
+    prefetch_comforting_phrase()
+
+    # Serve with waitress like main.py (a thread pool, and no Werkzeug
+    # debugger exposed on the network); Flask's server is the fallback
+    try:
+        from waitress import serve
+        logger.info("Serving with waitress")
+        serve(app, host=PI_HOST, port=PI_PORT, threads=4)
+    except ImportError:
+        logger.warning("waitress not installed, using Flask's built-in server")
+        app.run(
+            host=PI_HOST,
+            port=PI_PORT,
+            debug=False,
+            threaded=True
+        )
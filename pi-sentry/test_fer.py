@@ -1,13 +1,20 @@
 import cv2
 import numpy as np
-import tensorflow.lite as tflite
+# The standalone TFLite runtime is far lighter than full TensorFlow (which
+# is still used if it's all that's installed, e.g. on a dev machine)
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    import tensorflow.lite as tflite
+    Interpreter = tflite.Interpreter
 from picamera2 import Picamera2
 import time
 
 # --- Load Models ---
 try:
     # Load TFLite model for emotions
-    interpreter = tflite.Interpreter(model_path="assets/emotion-model.tflite")
+    # XNNPACK kernels run across all 4 Pi cores
+    interpreter = Interpreter(model_path="assets/emotion-model.tflite", num_threads=4)
     interpreter.allocate_tensors()
     input_details = interpreter.get_input_details()
     output_details = interpreter.get_output_details()
@@ -17,6 +24,11 @@ try:
     IMG_HEIGHT = input_shape[1]
     IMG_WIDTH = input_shape[2]
 
+    # Faces are resized into resize_buf and scaled straight into the
+    # interpreter's own input tensor, so nothing is allocated per face
+    input_tensor = interpreter.tensor(input_details[0]['index'])
+    resize_buf = np.empty((IMG_HEIGHT, IMG_WIDTH, 3), dtype=np.uint8)
+
     # Load OpenCV model for face detection
     face_cascade = cv2.CascadeClassifier('haarcascade_frontalface_default.xml')
 
@@ -68,15 +80,14 @@ while True:
 
             # --- Preprocess for FER Model ---
             # 1. Resize to the model's expected input size
-            roi_resized = cv2.resize(face_roi_bgr, (IMG_WIDTH, IMG_HEIGHT))
-            # 2. Normalize pixel values (common for many models)
-            roi_normalized = roi_resized.astype('float32') / 255.0
-            # 3. Expand dimensions to match model input (1, H, W, 3)
-            roi_final = np.expand_dims(roi_normalized, axis=0)
-            # Note: No second expand_dims needed for color images (BGR = 3 channels)
+            cv2.resize(face_roi_bgr, (IMG_WIDTH, IMG_HEIGHT), dst=resize_buf)
+            # 2. Normalize pixel values into the (1, H, W, 3) input tensor
+            model_input = input_tensor()[0]
+            np.multiply(resize_buf, 1.0 / 255.0, out=model_input, casting='unsafe')
+            # invoke() refuses to run while a view into the interpreter is alive
+            del model_input
 
             # --- Run Inference ---
-            interpreter.set_tensor(input_details[0]['index'], roi_final)
             interpreter.invoke()
 
             # Get the prediction
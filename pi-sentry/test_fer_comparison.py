@@ -4,14 +4,21 @@ Helps determine which input format the emotion model was trained on
 """
 import cv2
 import numpy as np
-import tensorflow.lite as tflite
+# The standalone TFLite runtime is far lighter than full TensorFlow (which
+# is still used if it's all that's installed, e.g. on a dev machine)
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    import tensorflow.lite as tflite
+    Interpreter = tflite.Interpreter
 from picamera2 import Picamera2
 import time
 
 # --- Load Models ---
 try:
     # Load TFLite model for emotions
-    interpreter = tflite.Interpreter(model_path="assets/emotion-model.tflite")
+    # XNNPACK kernels run across all 4 Pi cores
+    interpreter = Interpreter(model_path="assets/emotion-model.tflite", num_threads=4)
     interpreter.allocate_tensors()
     input_details = interpreter.get_input_details()
     output_details = interpreter.get_output_details()
@@ -22,6 +29,10 @@ try:
     IMG_WIDTH = input_shape[2]
     print(f"Model input shape: {input_shape}")
 
+    # Faces are normalised straight into the interpreter's own input tensor
+    input_tensor = interpreter.tensor(input_details[0]['index'])
+    MODEL_CHANNELS = input_shape[3]
+
     # Load OpenCV model for face detection
     face_cascade = cv2.CascadeClassifier('haarcascade_frontalface_default.xml')
 
@@ -54,24 +65,26 @@ def test_preprocessing(face_roi, mode="BGR"):
         face_roi: Face region to test
         mode: "BGR" or "GRAY"
     """
-    if mode == "GRAY":
-        # Grayscale preprocessing
+    if mode == "GRAY" or MODEL_CHANNELS == 1:
+        # Grayscale preprocessing (a 1-channel model can only take gray)
         if len(face_roi.shape) == 3:
             face_gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
         else:
             face_gray = face_roi
         roi_resized = cv2.resize(face_gray, (IMG_WIDTH, IMG_HEIGHT))
-        roi_normalized = roi_resized.astype('float32') / 255.0
-        roi_final = np.expand_dims(roi_normalized, axis=0)
-        roi_final = np.expand_dims(roi_final, axis=-1)  # Add channel dimension
+        # Add channel dimension; broadcast across a colour model's channels
+        roi_resized = roi_resized[:, :, np.newaxis]
     else:  # BGR
         # Color preprocessing
         roi_resized = cv2.resize(face_roi, (IMG_WIDTH, IMG_HEIGHT))
-        roi_normalized = roi_resized.astype('float32') / 255.0
-        roi_final = np.expand_dims(roi_normalized, axis=0)
+
+    # Normalize pixel values into the (1, H, W, C) input tensor
+    model_input = input_tensor()[0]
+    np.multiply(roi_resized, 1.0 / 255.0, out=model_input, casting='unsafe')
+    # invoke() refuses to run while a view into the interpreter is alive
+    del model_input
 
     # Run inference
-    interpreter.set_tensor(input_details[0]['index'], roi_final)
     interpreter.invoke()
     predictions = interpreter.get_tensor(output_details[0]['index'])[0]
 
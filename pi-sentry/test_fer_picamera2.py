@@ -5,14 +5,45 @@ Uses picamera2 (libcamera) instead of cv2.VideoCapture for Raspberry Pi camera a
 
 import cv2
 import numpy as np
-import tensorflow.lite as tflite
+# The standalone TFLite runtime is far lighter than full TensorFlow (which
+# is still used if it's all that's installed, e.g. on a dev machine)
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    import tensorflow.lite as tflite
+    Interpreter = tflite.Interpreter
 from picamera2 import Picamera2
 import time
+import os
+import logging
+
+# Per-frame results go through logging, so they cost nothing (no string
+# formatting, no stdout lock) when the level is raised to WARNING
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger("fer")
+
+# The int8 model (see EMOTION_MODEL_INT8_PATH in fer_service.py) is used
+# when it's there, otherwise the float one
+MODEL_PATH = "assets/emotion-model.tflite"
+INT8_MODEL_PATH = "assets/emotion-model-int8.tflite"
+
+# Camera frame rate; capture_array() blocks until the next frame, so this
+# also paces the loop and every frame processed is the newest one
+FRAME_RATE = 15
+
+# YuNet face detector (OpenCV DNN), same model as fer_service.py
+FACE_DETECTOR_MODEL_PATH = "assets/face_detection_yunet_2023mar.onnx"
+
+# Faces are found and cropped on the camera's low-res YUV420 stream: its Y
+# plane is already a grayscale image, so no full-frame conversion is needed
+LORES_SIZE = (320, 240)
 
 # --- Load Models ---
 try:
     # Load TFLite model for emotions
-    interpreter = tflite.Interpreter(model_path="assets/emotion-model.tflite")
+    # XNNPACK kernels run across all 4 Pi cores
+    model_path = INT8_MODEL_PATH if os.path.exists(INT8_MODEL_PATH) else MODEL_PATH
+    interpreter = Interpreter(model_path=model_path, num_threads=4)
     interpreter.allocate_tensors()
     input_details = interpreter.get_input_details()
     output_details = interpreter.get_output_details()
@@ -22,12 +53,28 @@ try:
     IMG_HEIGHT = input_shape[1]
     IMG_WIDTH = input_shape[2]
 
-    print(f"Emotion model loaded. Input shape: {IMG_WIDTH}x{IMG_HEIGHT}")
-
-    # Load OpenCV model for face detection
-    face_cascade = cv2.CascadeClassifier('haarcascade_frontalface_default.xml')
-    if face_cascade.empty():
-        raise Exception("Failed to load haarcascade_frontalface_default.xml")
+    # Faces are resized into resize_buf and scaled straight into the
+    # interpreter's own input tensor, so nothing is allocated per face
+    input_tensor = interpreter.tensor(input_details[0]['index'])
+    resize_buf = np.empty((IMG_HEIGHT, IMG_WIDTH), dtype=np.uint8)
+
+    # Integer models take q = x / scale + zero_point; the /255 is folded
+    # into the scale. Integer outputs are dequantized for the confidence.
+    input_dtype = input_details[0]['dtype']
+    quantized_input = input_dtype in (np.int8, np.uint8)
+    if quantized_input:
+        input_scale, input_zero_point = input_details[0]['quantization']
+        quant_range = (np.iinfo(input_dtype).min, np.iinfo(input_dtype).max)
+        quant_buf = np.empty((IMG_HEIGHT, IMG_WIDTH), dtype=np.float32)
+    output_scale, output_zero_point = output_details[0]['quantization']
+    quantized_output = output_details[0]['dtype'] in (np.int8, np.uint8)
+
+    print(f"Emotion model loaded ({model_path}). Input shape: {IMG_WIDTH}x{IMG_HEIGHT}")
+
+    # Load OpenCV model for face detection (sized for the low-res stream)
+    face_detector = cv2.FaceDetectorYN.create(
+        FACE_DETECTOR_MODEL_PATH, "", LORES_SIZE, 0.6, 0.3, 5000
+    )
 
     print("Face detection model loaded.")
 
@@ -36,8 +83,8 @@ try:
 
 except Exception as e:
     print(f"Error loading models: {e}")
-    print("Make sure 'haarcascade_frontalface_default.xml' is in pi-sentry/")
-    print("And 'emotion-model.tflite' is in assets/")
+    print("Make sure 'face_detection_yunet_2023mar.onnx' and 'emotion-model.tflite' are in assets/")
+    print("(YuNet needs OpenCV 4.8+)")
     exit()
 
 
@@ -47,9 +94,11 @@ try:
     picam2 = Picamera2()
 
     # Configure camera for video capture
-    # Using a smaller resolution for faster processing
+    # The ISP scales the low-res stream for us; only that one is read
     config = picam2.create_preview_configuration(
-        main={"size": (640, 480), "format": "RGB888"}
+        main={"size": (640, 480), "format": "RGB888"},
+        lores={"size": LORES_SIZE, "format": "YUV420"},
+        controls={"FrameRate": FRAME_RATE}
     )
     picam2.configure(config)
 
@@ -78,44 +127,49 @@ fps = 0
 
 try:
     while True:
-        # Capture frame from camera
-        frame = picam2.capture_array()
-
-        # picamera2 returns RGB, OpenCV expects BGR
-        # Convert RGB to BGR for OpenCV processing
-        frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        # Capture the low-res frame from camera
+        yuv = picam2.capture_array("lores")
 
-        # Convert to grayscale for face detection
-        gray_frame = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+        # The Y plane (the first rows of a YUV420 buffer) is the grayscale
+        # image, used as-is for the model's face crops
+        gray_frame = yuv[:LORES_SIZE[1], :LORES_SIZE[0]]
 
-        # Detect faces
-        faces = face_cascade.detectMultiScale(
-            gray_frame,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
+        # Detect faces (YuNet wants three channels; cheap at this size)
+        _, detections = face_detector.detect(cv2.cvtColor(gray_frame, cv2.COLOR_GRAY2BGR))
+        faces = [] if detections is None else detections[:, :4]
 
         # Process each face
-        for (x, y, w, h) in faces:
+        for face in faces:
+            (x, y, w, h) = (int(v) for v in face)
+            # YuNet boxes can overhang the frame edge
+            x, y = max(x, 0), max(y, 0)
+
             # Extract the face region
             face_roi_gray = gray_frame[y:y+h, x:x+w]
 
             # --- Preprocess for FER Model ---
             # 1. Resize to the model's expected input size
-            roi_resized = cv2.resize(face_roi_gray, (IMG_WIDTH, IMG_HEIGHT))
-            # 2. Normalize pixel values (common for many models)
-            roi_normalized = roi_resized.astype('float32') / 255.0
-            # 3. Expand dimensions to match model input (1, 48, 48, 1)
-            roi_final = np.expand_dims(roi_normalized, axis=0)
-            roi_final = np.expand_dims(roi_final, axis=-1)
+            cv2.resize(face_roi_gray, (IMG_WIDTH, IMG_HEIGHT), dst=resize_buf)
+            # 2. Normalize pixel values into the (1, H, W, 1) input tensor
+            model_input = input_tensor()[0, :, :, 0]
+            if quantized_input:
+                np.multiply(resize_buf, 1.0 / (255.0 * input_scale), out=quant_buf, casting='unsafe')
+                np.add(quant_buf, input_zero_point, out=quant_buf)
+                np.rint(quant_buf, out=quant_buf)
+                np.clip(quant_buf, *quant_range, out=quant_buf)
+                model_input[...] = quant_buf
+            else:
+                np.multiply(resize_buf, 1.0 / 255.0, out=model_input, casting='unsafe')
+            # invoke() refuses to run while a view into the interpreter is alive
+            del model_input
 
             # --- Run Inference ---
-            interpreter.set_tensor(input_details[0]['index'], roi_final)
             interpreter.invoke()
 
             # Get the prediction
             predictions = interpreter.get_tensor(output_details[0]['index'])[0]
+            if quantized_output:
+                predictions = (predictions.astype(np.float32) - output_zero_point) * output_scale
 
             # Get the dominant emotion
             emotion_index = np.argmax(predictions)
@@ -123,7 +177,7 @@ try:
             confidence = np.max(predictions) * 100
 
             # Print emotion to terminal
-            print(f"Detected: {emotion_text} ({confidence:.2f}%) | FPS: {fps:.1f}")
+            logger.info("Detected: %s (%.2f%%) | FPS: %.1f", emotion_text, confidence, fps)
 
         # Calculate FPS
         frame_count += 1
@@ -133,9 +187,6 @@ try:
             frame_count = 0
             last_print_time = current_time
 
-        # Small delay to prevent overwhelming the system
-        time.sleep(0.1)
-
 except KeyboardInterrupt:
     print("\n\nStopping FER test...")
 
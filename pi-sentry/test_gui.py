@@ -15,7 +15,9 @@ pygame.display.set_caption("Debug Duck GUI Test")
 
 # --- Load Assets ---
 try:
-    duck_image = pygame.image.load("assets/animations/duck_neutral.png")
+    # convert_alpha() (after set_mode) matches the display's pixel format,
+    # so blits are plain copies instead of per-pixel conversions
+    duck_image = pygame.image.load("assets/animations/duck_neutral.png").convert_alpha()
     # Scale the image
     duck_image = pygame.transform.scale(duck_image, (400, 400))
     print("Image loaded successfully.")
@@ -26,6 +28,10 @@ except FileNotFoundError:
 
 # --- Main Loop ---
 running = True
+# Only repaint when something changed; otherwise just poll for events
+needs_redraw = True
+duck_rect = duck_image.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+clock = pygame.time.Clock()
 print("Pygame loop starting. Look at your 7\" screen!")
 print("Press 'q' or tap the window to quit.")
 
@@ -40,18 +46,22 @@ while running:
         if event.type == pygame.MOUSEBUTTONDOWN:
             print("Mouse clicked")
             running = False
+        if event.type == pygame.VIDEOEXPOSE:
+            # Window contents were lost
+            needs_redraw = True
 
-    # Draw a black background
-    screen.fill((0, 0, 0))
+    if needs_redraw:
+        # Draw a black background
+        screen.fill((0, 0, 0))
 
-    # Draw the duck in the center
-    center_x = SCREEN_WIDTH // 2
-    center_y = SCREEN_HEIGHT // 2
-    duck_rect = duck_image.get_rect(center=(center_x, center_y))
-    screen.blit(duck_image, duck_rect)
+        # Draw the duck in the center
+        screen.blit(duck_image, duck_rect)
 
-    # Update the display
-    pygame.display.flip()
+        # Update the display
+        pygame.display.flip()
+        needs_redraw = False
+
+    clock.tick(60)
 
 pygame.quit()
 print("GUI test finished.")
\ No newline at end of file
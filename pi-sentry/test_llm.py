@@ -1,4 +1,7 @@
 import os
+import sys
+import time
+import httpx
 from openai import OpenAI
 from dotenv import load_dotenv
 
@@ -8,28 +11,64 @@ load_dotenv()
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 YOUR_APP_URL = "http://github.com/your-username/debug-duck" # Change this
 
+# Pass --speak to hear the reply through Piper as it streams in
+SPEAK = "--speak" in sys.argv
+
+# One client for the whole script: its connection pool keeps the TLS
+# session open, so only the first call pays for the handshake
+client = OpenAI(
+    base_url="https://openrouter.ai/api/v1",
+    api_key=OPENROUTER_API_KEY or "missing",
+    default_headers={"HTTP-Referer": YOUR_APP_URL},
+    http_client=httpx.Client(limits=httpx.Limits(max_keepalive_connections=4))
+)
+
+
+def stream_reply(response, start):
+    """Yield each token as it arrives, printing it (and the time to the first)"""
+    first_token_time = None
+    for chunk in response:
+        if not chunk.choices:
+            continue
+        token = chunk.choices[0].delta.content
+        if not token:
+            continue
+        if first_token_time is None:
+            first_token_time = time.perf_counter() - start
+        print(token, end="", flush=True)
+        yield token
+    print()
+    if first_token_time is not None:
+        print(f"First token after {first_token_time:.2f}s, done after {time.perf_counter() - start:.2f}s")
+
+
 if not OPENROUTER_API_KEY:
     print("Error: OPENROUTER_API_KEY not found in .env file.")
 else:
     try:
-        client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=OPENROUTER_API_KEY,
-            default_headers={"HTTP-Referer": YOUR_APP_URL}
-        )
-        
         print("Calling OpenRouter (DeepSeek)...")
-        
+
+        start = time.perf_counter()
+        # Streamed, so the reply starts printing (and speaking) before the
+        # model has finished generating it
         response = client.chat.completions.create(
             model="deepseek/deepseek-chat",
             messages=[
                 {"role": "system", "content": "You are a debug duck. Say 'Quack!'"},
                 {"role": "user", "content": "Test call."}
-            ]
+            ],
+            stream=True
         )
-        
-        text = response.choices[0].message.content
-        print(f"Success! Duck says: {text}")
+
+        print("Success! Duck says: ", end="")
+        tokens = stream_reply(response, start)
+        if SPEAK:
+            # speak_stream buffers the tokens into sentences for Piper
+            import tts_service
+            tts_service.speak_stream(tokens)
+        else:
+            for _ in tokens:
+                pass
 
     except Exception as e:
-        print(f"An error occurred: {e}")
\ No newline at end of file
+        print(f"An error occurred: {e}")
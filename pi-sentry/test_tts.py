@@ -1,4 +1,4 @@
-import os
+import subprocess
 
 # Path to your piper executable (adjust if you put it elsewhere)
 PIPER_PATH = "./piper/piper"
@@ -6,12 +6,24 @@ MODEL_PATH = "./piper/en_US-lessac-medium.onnx" # The voice file
 
 def speak(text):
     print(f"Duck is saying: {text}")
-    # Use os.system to build and run the command
-    # This pipes the text to piper, which generates audio,
-    # which is then piped to 'aplay' to be spoken.
-    command = f'echo "{text}" | {PIPER_PATH} --model {MODEL_PATH} --output_file - | aplay'
-    os.system(command)
+    # Text goes straight into piper's stdin (no shell, so quotes in the
+    # text are fine), piper's raw audio is piped into 'aplay' to be spoken.
+    piper = subprocess.Popen(
+        [PIPER_PATH, "--model", MODEL_PATH, "--output_raw"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE
+    )
+    aplay = subprocess.Popen(
+        ["aplay", "-q", "-r", "22050", "-f", "S16_LE", "-c", "1", "-t", "raw"],
+        stdin=piper.stdout
+    )
+    # aplay owns the read end now
+    piper.stdout.close()
+    piper.stdin.write(text.encode("utf-8"))
+    piper.stdin.close()
+    aplay.wait()
+    piper.wait()
 
 # --- Let's test it ---
 speak("Hello, this is a test of my voice.")
-speak("One, two, three.")
\ No newline at end of file
+speak("One, two, three.")
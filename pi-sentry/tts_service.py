@@ -4,10 +4,31 @@ Uses Piper TTS to make the duck speak
 """
 
 import subprocess
+import shutil
 import os
+import fcntl
+import select
+import termios
+import struct
+import hashlib
+import re
+import json
+import time
+import queue
+import atexit
+import threading
+from collections import deque
+from functools import lru_cache
+import numpy as np
 from dotenv import load_dotenv
 import logging
 
+# pyalsaaudio is optional; without it audio is played through aplay
+try:
+    import alsaaudio
+except ImportError:
+    alsaaudio = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,112 +39,832 @@ load_dotenv()
 # Get TTS configuration from environment
 PIPER_EXECUTABLE = os.environ.get("PIPER_EXECUTABLE_PATH", "./piper/piper")
 PIPER_VOICE_MODEL = os.environ.get("PIPER_VOICE_MODEL", "./piper/en_US-lessac-medium.onnx")
+# int8 (dynamically quantised) copy of the voice, made by setup_pi.sh and
+# used instead when present: roughly half the synthesis time on the Pi's
+# CPU. PIPER_QUANT=false goes back to the original float model.
+PIPER_VOICE_MODEL_INT8 = os.environ.get("PIPER_VOICE_MODEL_INT8", "./piper/en_US-lessac-medium.int8.onnx")
+PIPER_QUANT = os.environ.get("PIPER_QUANT", "true").lower() == "true"
+PIPER_DEFAULT_SAMPLE_RATE = 22050  # Piper's "medium" voices
+SPEAK_TIMEOUT = 30  # seconds, for Piper to start (or warm up) and synthesise a line
+# Piper gets lines of at most this many characters (about two sentences);
+# a longer run-on sentence is split at a comma or space, so the first audio
+# never waits on one huge line
+MAX_CHARS_PER_CHUNK = 240
+# Load the voice (see prewarm()) at startup rather than on the first reply
+TTS_PREWARM = os.environ.get("TTS_PREWARM", "true").lower() == "true"
+# Audio is written to the sound card one period at a time, with only
+# ALSA_PERIODS periods buffered: smaller/fewer means less delay before
+# speech is heard but more risk of underruns (crackles)
+ALSA_PERIOD_MS = int(os.environ.get("ALSA_PERIOD_MS", 20))
+ALSA_PERIODS = int(os.environ.get("ALSA_PERIODS", 3))
+
+# The thread writing to the sound card runs with real-time (SCHED_RR)
+# priority, pinned to this core, so the small buffer above isn't emptied
+# while it waits to be scheduled. Needs root (sudo) or CAP_SYS_NICE;
+# without it the thread just runs normally. -1 leaves it unpinned.
+TTS_AUDIO_PRIORITY = int(os.environ.get("TTS_AUDIO_PRIORITY", 10))
+TTS_AUDIO_CPU = int(os.environ.get("TTS_AUDIO_CPU", 3))
+
+# Volume boost (or cut) applied to the speech, in dB; 0 leaves it untouched
+TTS_GAIN_DB = float(os.environ.get("TTS_GAIN_DB", 0))
+# The same as a x/256 fixed-point multiplier
+_GAIN_Q8 = int(round(10 ** (TTS_GAIN_DB / 20) * 256))
+
+# Piper -> speaker pipe size; big enough for Piper to finish a long
+# sentence while the speaker is still playing the one before
+PIPER_PIPE_BYTES = 1024 * 1024
+_F_SETPIPE_SZ = getattr(fcntl, "F_SETPIPE_SZ", 1031)  # Python < 3.10 lacks it
+
+# subprocess starts children with posix_spawn() instead of fork()+exec()
+# (fork copies the page tables of a Python process with the LLM libraries
+# loaded, tens of ms on a Pi) only if the executable is given as a path,
+# close_fds is off and there's no preexec_fn. Python's own fds aren't
+# inherited anyway (PEP 446), so turning close_fds off leaks nothing.
+APLAY = shutil.which("aplay") or "aplay"
+SPEAKER_TEST = shutil.which("speaker-test") or "speaker-test"
+_SPAWN_ARGS = {"close_fds": False}
+
+# Short phrases asked for more than once (fallback phrases, greetings)
+# are kept as raw audio here and played without running Piper
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", "./tts_cache")
+TTS_CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_MB", 50)) * 1024 * 1024
+TTS_CACHE_MAX_CHARS = 200  # longer replies are never repeated word for word
+# A phrase is cached once the duck has stopped talking; given up after this
+# many seconds of talking (and tried again if the phrase keeps repeating)
+CACHE_FILL_WAIT = 60
+
+# Whitespace after sentence-ending punctuation
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+
+def _apply_gain(pcm_bytes):
+    """
+    Scale S16_LE audio by TTS_GAIN_DB, clipping instead of wrapping around.
+    Vectorised, so it's cheap next to playback (no ffmpeg or Python loop).
+    """
+    samples = np.frombuffer(pcm_bytes, dtype=np.int16).astype(np.int32)
+    samples *= _GAIN_Q8
+    samples >>= 8
+    np.clip(samples, -32768, 32767, out=samples)
+    return samples.astype(np.int16).tobytes()
 
 
-def speak(text):
+def _make_realtime():
+    """Give the calling thread real-time priority and its own core, if allowed"""
+    # On Linux, pid 0 means just the calling thread
+    try:
+        os.sched_setscheduler(0, os.SCHED_RR, os.sched_param(TTS_AUDIO_PRIORITY))
+    except (AttributeError, OSError) as e:
+        logger.debug("Audio thread left at normal priority: %s", e)
+
+    if TTS_AUDIO_CPU >= 0:
+        try:
+            os.sched_setaffinity(0, {TTS_AUDIO_CPU})
+        except (AttributeError, OSError) as e:
+            logger.debug("Audio thread left unpinned: %s", e)
+
+
+@lru_cache(maxsize=1)
+def _voice_sample_rate():
+    """Sample rate of the Piper voice, from the .onnx.json next to the model"""
+    try:
+        with open(f"{PIPER_VOICE_MODEL}.json") as f:
+            return int(json.load(f)["audio"]["sample_rate"])
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning("Couldn't read voice sample rate (%s), assuming %d Hz", e, PIPER_DEFAULT_SAMPLE_RATE)
+        return PIPER_DEFAULT_SAMPLE_RATE
+
+
+class _PiperDaemon:
     """
-    Convert text to speech and play it through the speaker.
+    One long-running Piper process, so the voice model is loaded once
+    rather than on every utterance. Each line written to its stdin comes
+    out of stdout as raw PCM, which a pump thread writes straight to the
+    ALSA device (or into one long-running aplay without pyalsaaudio).
+    """
+
+    def __init__(self):
+        sample_rate = _voice_sample_rate()
+        self.bytes_per_second = sample_rate * 2  # S16_LE mono
+        # One read and one write per ALSA period (whole 2-byte samples)
+        self.chunk_bytes = self.bytes_per_second * ALSA_PERIOD_MS // 1000 // 2 * 2
+
+        # Open the speaker first so a busy sound card fails before Piper
+        # has been started
+        self.pcm = self.aplay = None
+        if alsaaudio:
+            self.pcm = alsaaudio.PCM(
+                alsaaudio.PCM_PLAYBACK,
+                rate=sample_rate,
+                channels=1,
+                format=alsaaudio.PCM_FORMAT_S16_LE,
+                periodsize=self.chunk_bytes // 2,
+                periods=ALSA_PERIODS
+            )
+            write = self.pcm.write
+        else:
+            # Same small buffer as the pyalsaaudio path; aplay's default
+            # is ~500 ms, all of it added before speech is heard
+            self.aplay = subprocess.Popen(
+                [APLAY, "-q", "-t", "raw", "-f", "S16_LE", "-c", "1", "-r", str(sample_rate),
+                 f"--period-time={ALSA_PERIOD_MS * 1000}",
+                 f"--buffer-time={ALSA_PERIOD_MS * ALSA_PERIODS * 1000}"],
+                stdin=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0,  # every write is already a whole chunk
+                **_SPAWN_ARGS
+            )
+            write = self.aplay.stdin.write
+
+        if _GAIN_Q8 != 256:
+            self._play = lambda chunk: write(_apply_gain(chunk))
+        else:
+            self._play = write
+
+        self.model_path = PIPER_VOICE_MODEL
+        if PIPER_QUANT and os.path.exists(PIPER_VOICE_MODEL_INT8):
+            self.model_path = PIPER_VOICE_MODEL_INT8
+            logger.info("Using int8 voice model")
+
+        # stdout is read in chunks and goes straight on to the speaker;
+        # it must never be collected (communicate()/capture_output), which
+        # would hold a whole reply's audio in memory. stderr is kept: Piper
+        # logs one "Real-time factor" line as it finishes each input line,
+        # which is how utterances are tracked
+        try:
+            self.piper = subprocess.Popen(
+                # The voice config is the float model's (same voice either way)
+                [PIPER_EXECUTABLE, "--model", self.model_path, "--config", f"{PIPER_VOICE_MODEL}.json",
+                 "--output_raw"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                bufsize=-1,  # text in: let io pick the buffer, flushed per line
+                **_SPAWN_ARGS
+            )
+        except Exception:
+            self._close_output()
+            raise
+
+        # With the default 64 KiB pipe (~1.5 s of audio) Piper blocks on
+        # its next write as soon as it gets that far ahead of the speaker
+        try:
+            fcntl.fcntl(self.piper.stdout.fileno(), _F_SETPIPE_SZ, PIPER_PIPE_BYTES)
+        except OSError as e:
+            logger.debug("Couldn't enlarge Piper's output pipe: %s", e)
+
+        # One (Event, muted) per line written; the Events are set in order
+        # as Piper finishes the lines
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self.failed = False
+
+        # Cleared while a muted line (the warm-up, or a phrase being cached)
+        # is being synthesised or is still in the pipe; its audio is thrown
+        # away or collected into _capture. A muted line is
+        # only queued with nothing else pending or unread, and lines to be
+        # played wait for it, so the pipe holds nothing else meanwhile.
+        # Only cleared, and checked before queueing, under _lock
+        self._unmuted = threading.Event()
+        self._unmuted.set()
+        # Once the muted line is finished: how much of its audio is still
+        # unread. Reads and FIONREAD are done under _mute_lock so the two agree
+        self._muted_bytes = None
+        self._muted_done = None
+        self._capture = None
+        self._mute_lock = threading.Lock()
+
+        # Held while writing to the speaker (by the pump, or play())
+        self._play_lock = threading.Lock()
+
+        # When the audio handed to the speaker so far will have finished playing
+        # (time.monotonic() clock)
+        self.play_until = 0.0
+
+        threading.Thread(target=self._pump_audio, daemon=True).start()
+        threading.Thread(target=self._watch_log, daemon=True).start()
+
+        logger.info("Piper started (PID: %d)", self.piper.pid)
+
+    def alive(self):
+        """True while Piper (and aplay, if used) is running"""
+        if self.failed or self.piper.poll() is not None:
+            return False
+        return self.aplay is None or self.aplay.poll() is None
+
+    def say(self, text, muted=False, capture=None):
+        """
+        Queue text for synthesis.
+
+        Args:
+            text (str): The text to synthesise
+            muted (bool): Synthesise without playing it
+            capture (bytearray): For a muted line, collects its audio
+
+        Returns:
+            threading.Event: Set once Piper has synthesised the text (for a
+            muted line, once all its audio has been read; at once if it
+            was skipped)
+        """
+        # Piper treats every line as a separate utterance
+        line = " ".join(text.split())
+        done = threading.Event()
+        deadline = time.monotonic() + SPEAK_TIMEOUT
+        while True:
+            if not muted:
+                self._unmuted.wait(timeout=max(0, deadline - time.monotonic()))
+            with self._lock:
+                if muted and not self._start_muted(capture):
+                    done.set()
+                    return done
+                # Re-checked under the lock: a muted line may have got in
+                # between the wait and here
+                if muted or self._unmuted.is_set() or time.monotonic() >= deadline:
+                    self._pending.append((done, muted))
+                    self.piper.stdin.write(line.encode("utf-8") + b"\n")
+                    self.piper.stdin.flush()
+                    return done
+
+    def _start_muted(self, capture):
+        """
+        Mute for a new muted line (call with _lock held). Skipped, returning
+        False, if Piper already has audio on the way: that would be thrown
+        away too, and a real line warms Piper up just as well.
+        """
+        # Under _mute_lock so the pump can't be between a read and its
+        # mute check
+        with self._mute_lock:
+            if self._pending or self._unread() or not self._unmuted.is_set():
+                logger.debug("Piper is busy, not queueing the muted line")
+                return False
+            self._unmuted.clear()
+            self._capture = capture
+            return True
+
+    def idle(self):
+        """True when nothing is being synthesised, queued or played"""
+        with self._lock:
+            if self._pending:
+                return False
+        if self.play_until > time.monotonic():
+            return False
+        return self._unread() == 0
+
+    def _unread(self):
+        """Bytes Piper has written that the pump hasn't read yet"""
+        unread = fcntl.ioctl(self.piper.stdout.fileno(), termios.FIONREAD, b"\0\0\0\0")
+        return struct.unpack("i", unread)[0]
+
+    def play(self, pcm):
+        """Play raw audio (same format as Piper's) on the speaker"""
+        for i in range(0, len(pcm), self.chunk_bytes):
+            chunk = pcm[i:i + self.chunk_bytes]
+            self.play_until = max(self.play_until, time.monotonic()) + len(chunk) / self.bytes_per_second
+            with self._play_lock:
+                self._play(chunk)
+
+    def wait_played(self):
+        """Block until the audio sent to the speaker so far has played"""
+        # play_until can move on while sleeping if more audio arrives
+        while True:
+            remaining = self.play_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def _pump_audio(self):
+        """Copy Piper's PCM output to the speaker, tracking how much is queued"""
+        _make_realtime()
+        fd = self.piper.stdout.fileno()
+        # A read can end half way through a sample; that byte waits for
+        # the next read so only whole samples are played (or scaled)
+        partial = b""
+        try:
+            while True:
+                # Wait for audio outside the lock, so the read below never
+                # blocks holding it (the log watcher takes it for FIONREAD).
+                # One extra syscall per chunk, which is nothing next to a period
+                select.select([fd], [], [])
+                with self._mute_lock:
+                    chunk = os.read(fd, self.chunk_bytes)
+                    if chunk and not self._unmuted.is_set():
+                        if self._capture is not None:
+                            self._capture += chunk
+                        if self._muted_bytes is not None:
+                            self._muted_bytes -= len(chunk)
+                            if self._muted_bytes <= 0:
+                                self._unmute()
+                        continue
+                if not chunk:
+                    break
+                if partial:
+                    chunk, partial = partial + chunk, b""
+                if len(chunk) % 2:
+                    chunk, partial = chunk[:-1], chunk[-1:]
+                    if not chunk:
+                        continue
+                self.play_until = max(self.play_until, time.monotonic()) + len(chunk) / self.bytes_per_second
+                # Blocks while the ALSA buffer (or aplay's pipe) is full
+                with self._play_lock:
+                    self._play(chunk)
+        except Exception as e:
+            logger.error("Error playing speech: %s", e)
+            self.failed = True
+        finally:
+            self._close_output()
+
+    def _close_output(self):
+        """Release the sound card (aplay drains what it has, then exits)"""
+        try:
+            if self.pcm:
+                self.pcm.close()
+            elif self.aplay:
+                self.aplay.stdin.close()
+        except Exception:
+            pass
+
+    def _watch_log(self):
+        """Mark utterances done from Piper's log; fail them all if it exits"""
+        for line in self.piper.stderr:
+            if b"Real-time factor" in line:
+                with self._lock:
+                    if self._pending:
+                        done, muted = self._pending.popleft()
+                        if muted:
+                            self._finish_muted(done)
+                        else:
+                            done.set()
+            elif logger.isEnabledFor(logging.DEBUG):
+                # Piper's log is bytes; only decoded if it's going anywhere
+                logger.debug("piper: %s", line.decode("utf-8", "replace").strip())
+
+        self.failed = True
+        with self._mute_lock:
+            self._unmute()
+        with self._lock:
+            while self._pending:
+                self._pending.popleft()[0].set()
+
+    def _finish_muted(self, done):
+        """
+        Unmute once the muted line's audio has all been read. Piper logs
+        the line as finished after writing its audio, but the pump may not
+        have read all of it yet; whatever is left is counted off by the pump.
+        """
+        with self._mute_lock:
+            self._muted_done = done
+            unread = self._unread()
+            if unread:
+                self._muted_bytes = unread
+            else:
+                self._unmute()
+
+    def _unmute(self):
+        """Play audio again, finishing the muted line (call with _mute_lock held)"""
+        self._muted_bytes = None
+        self._capture = None
+        if self._muted_done is not None:
+            self._muted_done.set()
+            self._muted_done = None
+        self._unmuted.set()
+
+    def close(self):
+        """Let Piper (and aplay) finish what they have, then stop them"""
+        try:
+            self.piper.stdin.close()
+        except OSError:
+            pass
+        # The pump thread releases the speaker once Piper exits
+        for process in (self.piper, self.aplay):
+            if process is None:
+                continue
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+# Started on first use, and again if it ever dies
+_daemon = None
+_daemon_lock = threading.Lock()
+
+
+def _get_daemon():
+    """Return the running Piper daemon, starting it if needed"""
+    global _daemon
+    with _daemon_lock:
+        if _daemon is None or not _daemon.alive():
+            if _daemon is not None:
+                logger.warning("Piper stopped, restarting it")
+                _daemon.close()
+            _daemon = _PiperDaemon()
+        return _daemon
+
+
+def shutdown():
+    """Stop the Piper daemon (registered with atexit)"""
+    global _daemon
+    with _daemon_lock:
+        if _daemon is not None:
+            _daemon.close()
+            _daemon = None
+
+
+atexit.register(shutdown)
+
+
+def prewarm():
+    """
+    Start Piper and synthesise a throwaway line (not played) in the
+    background, so loading the voice model and warming up ONNX Runtime
+    doesn't delay the first thing the duck says (if that gets to Piper
+    first, it does the warming instead). Turned off with TTS_PREWARM=false.
+    """
+    if not TTS_PREWARM:
+        return
+
+    def warm_up():
+        try:
+            if not _check_paths():
+                return
+            start = time.perf_counter()
+            done = _get_daemon().say("Quack.", muted=True)
+            if done.wait(timeout=SPEAK_TIMEOUT):
+                logger.info("Piper warmed up in %.2fs", time.perf_counter() - start)
+        except Exception as e:
+            logger.error("Error warming up Piper: %s", e)
+
+    threading.Thread(target=warm_up, daemon=True).start()
+
+
+def _cut_long(sentence):
+    """
+    Split a sentence longer than MAX_CHARS_PER_CHUNK, preferring the last
+    comma, then the last space, before the limit.
+
+    Yields:
+        str: Pieces of at most MAX_CHARS_PER_CHUNK characters
+    """
+    if len(sentence) > MAX_CHARS_PER_CHUNK:
+        logger.warning("Splitting a %d-character sentence for Piper", len(sentence))
+
+    while len(sentence) > MAX_CHARS_PER_CHUNK:
+        cut = sentence.rfind(", ", 0, MAX_CHARS_PER_CHUNK) + 1  # keep the comma
+        if cut <= 0:
+            cut = sentence.rfind(" ", 0, MAX_CHARS_PER_CHUNK)
+        if cut <= 0:
+            cut = MAX_CHARS_PER_CHUNK
+        yield sentence[:cut]
+        sentence = sentence[cut:].lstrip()
+
+    if sentence.strip():
+        yield sentence
+
+
+def _split_sentences(chunks):
+    """
+    Yield each sentence from a stream of text pieces (e.g. LLM tokens) as
+    soon as the whitespace after its full stop arrives. Sentences longer
+    than MAX_CHARS_PER_CHUNK come out in pieces, as soon as each is full.
 
     Args:
-        text (str): The text for the duck to speak
+        chunks: Iterable of str pieces
 
-    Returns:
-        bool: True if speech was successful, False otherwise
+    Yields:
+        str: One sentence (or piece of one) at a time
     """
-    if not text or not text.strip():
-        logger.warning("Empty text provided to speak()")
+    buffer = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        *sentences, buffer = _SENTENCE_BOUNDARY.split(buffer)
+        for sentence in sentences:
+            yield from _cut_long(sentence)
+        # A run-on sentence still streaming in
+        if len(buffer) > MAX_CHARS_PER_CHUNK:
+            *pieces, buffer = _cut_long(buffer)
+            yield from pieces
+    yield from _cut_long(buffer)
+
+
+# Set once the Piper files have been found; they don't move at runtime
+_paths_verified = False
+
+
+def _check_paths():
+    """Check the Piper executable and voice model are installed"""
+    global _paths_verified
+    if _paths_verified:
+        return True
+
+    if not os.path.exists(PIPER_EXECUTABLE):
+        logger.error("Piper executable not found at: %s", PIPER_EXECUTABLE)
+        logger.error("Run setup_pi.sh to install Piper TTS")
         return False
 
-    logger.info(f"Speaking: '{text}'")
+    if not os.path.exists(PIPER_VOICE_MODEL):
+        logger.error("Voice model not found at: %s", PIPER_VOICE_MODEL)
+        logger.error("Run setup_pi.sh to download voice model")
+        return False
 
-    try:
-        # Check if Piper executable exists
-        if not os.path.exists(PIPER_EXECUTABLE):
-            logger.error(f"Piper executable not found at: {PIPER_EXECUTABLE}")
-            logger.error("Run setup_pi.sh to install Piper TTS")
-            return False
+    # Only success is remembered, so running setup_pi.sh fixes a failure
+    _paths_verified = True
+    return True
 
-        # Check if voice model exists
-        if not os.path.exists(PIPER_VOICE_MODEL):
-            logger.error(f"Voice model not found at: {PIPER_VOICE_MODEL}")
-            logger.error("Run setup_pi.sh to download voice model")
-            return False
 
-        # Build the command pipeline: echo text | piper | aplay
-        # Use subprocess.run with shell=True to handle the pipe
-        command = f'echo "{text}" | {PIPER_EXECUTABLE} --model {PIPER_VOICE_MODEL} --output_file - | aplay'
+# Phrases spoken once since startup; a phrase is cached the second time
+_seen_texts = set()
 
-        # Run the command
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=30  # Increased for longer AI responses
-        )
 
-        if result.returncode == 0:
-            logger.info("Speech completed successfully")
-            return True
+def _cache_path(daemon, text):
+    """Cache file for text in the daemon's voice"""
+    key = hashlib.sha1(f"{os.path.basename(daemon.model_path)}|{text}".encode("utf-8")).hexdigest()
+    return os.path.join(TTS_CACHE_DIR, f"{key}.pcm")
+
+
+def _speak_cached(daemon, text):
+    """
+    Play text from the cache if it's there and the speaker is free,
+    otherwise note it (and cache it in the background if it's a repeat).
+
+    Returns:
+        bool: True if the cached audio was played
+    """
+    text = " ".join(text.split())
+    if len(text) > TTS_CACHE_MAX_CHARS:
+        return False
+
+    path = _cache_path(daemon, text)
+    try:
+        with open(path, "rb") as f:
+            pcm = f.read()
+    except OSError:
+        if text in _seen_texts:
+            _seen_texts.discard(text)
+            threading.Thread(target=_fill_cache, args=(daemon, text, path), daemon=True).start()
         else:
-            logger.error(f"Speech failed with return code {result.returncode}")
-            if result.stderr:
-                logger.error(f"Error output: {result.stderr}")
-            return False
+            if len(_seen_texts) > 1000:
+                _seen_texts.clear()
+            _seen_texts.add(text)
+        return False
 
-    except subprocess.TimeoutExpired:
-        logger.error("Speech timeout - command took too long")
+    # Anything still in flight from Piper has to play first
+    if not daemon.idle():
         return False
+
+    try:
+        os.utime(path)  # recently used, so it's evicted last
+    except OSError:
+        pass  # evicted since it was read; the audio is already in hand
+    logger.info("Speaking (cached): '%s'", text)
+    daemon.play(pcm)
+    return True
+
+
+def _fill_cache(daemon, text, path):
+    """
+    Synthesise text into the cache (background thread). Done by the running
+    Piper as a muted line once it's idle, rather than by a second Piper that
+    would load the voice again and compete with it for the CPU while the
+    duck is talking.
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        deadline = time.monotonic() + CACHE_FILL_WAIT
+        while not daemon.idle():
+            if time.monotonic() >= deadline or not daemon.alive():
+                return
+            time.sleep(0.5)
+
+        pcm = bytearray()
+        done = daemon.say(text, muted=True, capture=pcm)
+        if not done.wait(timeout=SPEAK_TIMEOUT) or not daemon.alive() or not pcm:
+            # Skipped (Piper got busy again) or failed
+            return
+
+        os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "wb") as out:
+            out.write(pcm)
+        os.replace(tmp_path, path)
+        logger.info("Cached speech for '%s'", text)
+        _evict_cache()
     except Exception as e:
-        logger.error(f"Error during speech: {e}")
+        logger.warning("Couldn't cache speech: %s", e)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _evict_cache():
+    """Delete the least recently used cache files once over the size cap"""
+    entries = []
+    with os.scandir(TTS_CACHE_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(".pcm"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= TTS_CACHE_MAX_BYTES:
+            break
+        os.remove(path)
+        total -= size
+
+
+class _Utterance:
+    """One piece of speech waiting for the TTS worker"""
+
+    def __init__(self, sentences, text=None):
+        self.sentences = sentences
+        self.text = text  # the whole text, when known up front (for the cache)
+        self.done = threading.Event()  # set once synthesised (or failed)
+        self.ok = False
+        self.daemon = None
+
+
+# Utterances are fed to Piper by one worker thread, in the order they were
+# asked for, so sentences from callers on different threads (Flask, FER)
+# never interleave
+_requests = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _queue_speech(sentences, text=None):
+    """
+    Queue sentences for the TTS worker, starting it on first use.
+
+    Args:
+        sentences: Iterable of sentences to speak
+        text (str): The whole text, if known, so the cache can be used
+
+    Returns:
+        _Utterance: The queued utterance
+    """
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_tts_worker, daemon=True)
+            _worker.start()
+
+    utterance = _Utterance(sentences, text)
+    _requests.put(utterance)
+    return utterance
+
+
+def _tts_worker():
+    """Hand queued utterances to Piper one at a time (runs forever)"""
+    while True:
+        utterance = _requests.get()
+        try:
+            _synthesise(utterance)
+        except Exception as e:
+            logger.error("Error during speech: %s", e)
+        finally:
+            utterance.done.set()
+
+
+def _synthesise(utterance):
+    """
+    Send each sentence to Piper as it comes, then wait for them to be
+    synthesised. Sentence N plays while N+1 is being synthesised, and the
+    next utterance starts while this one is still playing.
+    """
+    daemon = _get_daemon()
+
+    if utterance.text is not None and _speak_cached(daemon, utterance.text):
+        utterance.daemon = daemon
+        utterance.ok = True
+        return
+
+    lines = []
+    for sentence in utterance.sentences:
+        logger.info("Speaking: '%s'", sentence)
+        lines.append((daemon.say(sentence), len(sentence)))
+
+    if not lines:
+        logger.warning("No text to speak")
+        return
+
+    # Piper finishes lines in order, so each timeout only has to cover its
+    # own line; the first also covers Piper starting and earlier speech.
+    # Piper can't finish a line until its output pipe has room, and that
+    # drains at playback speed, so the audio still queued is added on top
+    for i, (done, length) in enumerate(lines):
+        timeout = SPEAK_TIMEOUT if i == 0 else max(3, length * 0.05)
+        timeout += max(0, daemon.play_until - time.monotonic())
+        if not done.wait(timeout=timeout):
+            logger.error("Speech timeout - command took too long")
+            return
+    if daemon.failed:
+        logger.error("Speech failed - Piper exited")
+        return
+
+    utterance.daemon = daemon
+    utterance.ok = True
+
+
+def _wait_spoken(utterance):
+    """
+    Block until a queued utterance has been synthesised and played.
+
+    Returns:
+        bool: True if speech was successful, False otherwise
+    """
+    utterance.done.wait()
+    if not utterance.ok:
         return False
 
+    # Synthesis is done; wait for the last of the audio to play out
+    utterance.daemon.wait_played()
+    logger.info("Speech completed successfully")
+    return True
 
-def speak_async(text):
+
+def _speak_impl(text, *, wait):
     """
-    Convert text to speech and play it asynchronously (non-blocking).
-    Useful when you don't want to wait for speech to complete.
+    The one implementation behind speak(), speak_stream() and speak_async().
 
     Args:
-        text (str): The text for the duck to speak
+        text: The text for the duck to speak, or an iterable of str pieces
+            (e.g. streamed LLM tokens)
+        wait (bool): Block until the speech has played, rather than
+            returning as soon as it's queued
 
     Returns:
-        subprocess.Popen: The process object, or None on error
+        bool if wait (True if speech was successful), otherwise
+        threading.Event (set once Piper has synthesised the text) or None
     """
-    if not text or not text.strip():
-        logger.warning("Empty text provided to speak_async()")
-        return None
+    failed = False if wait else None
 
-    logger.info(f"Speaking async: '{text}'")
+    if isinstance(text, str):
+        if not text.strip():
+            logger.warning("Empty text provided to speak")
+            return failed
+        pieces, whole_text = [text], text
+    else:
+        # Read on the worker thread as the tokens arrive
+        pieces, whole_text = text, None
 
     try:
-        # Check if Piper executable exists
-        if not os.path.exists(PIPER_EXECUTABLE):
-            logger.error(f"Piper executable not found at: {PIPER_EXECUTABLE}")
-            return None
-
-        # Check if voice model exists
-        if not os.path.exists(PIPER_VOICE_MODEL):
-            logger.error(f"Voice model not found at: {PIPER_VOICE_MODEL}")
-            return None
-
-        # Build the command pipeline
-        command = f'echo "{text}" | {PIPER_EXECUTABLE} --model {PIPER_VOICE_MODEL} --output_file - | aplay'
-
-        # Start the process in the background
-        process = subprocess.Popen(
-            command,
-            shell=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
+        if not _check_paths():
+            return failed
 
-        logger.info(f"Speech started (PID: {process.pid})")
-        return process
+        utterance = _queue_speech(_split_sentences(pieces), whole_text)
+        if not wait:
+            logger.info("Speech queued")
+            return utterance.done
+        return _wait_spoken(utterance)
 
     except Exception as e:
-        logger.error(f"Error starting async speech: {e}")
-        return None
+        logger.error("Error during speech: %s", e)
+        return failed
+
+
+def speak(text):
+    """
+    Convert text to speech and play it through the speaker.
+
+    Args:
+        text (str): The text for the duck to speak
+
+    Returns:
+        bool: True if speech was successful, False otherwise
+    """
+    return _speak_impl(text or "", wait=True)
+
+
+def speak_stream(tokens):
+    """
+    Speak text while it is still being generated: tokens are buffered
+    until a sentence is complete, and each sentence is handed to Piper
+    straight away, so the duck starts talking after the first sentence
+    rather than the whole reply.
+
+    Args:
+        tokens: Iterable of str pieces (e.g. streamed LLM tokens), or a str
+
+    Returns:
+        bool: True if speech was successful, False otherwise
+    """
+    return _speak_impl(tokens, wait=True)
+
+
+def speak_async(text):
+    """
+    Convert text to speech and play it asynchronously (non-blocking).
+    Useful when you don't want to wait for speech to complete.
+
+    Args:
+        text (str): The text for the duck to speak
+
+    Returns:
+        threading.Event: Set once Piper has synthesised the text, or None on error
+    """
+    return _speak_impl(text or "", wait=False)
 
 
 def test_audio():
@@ -135,12 +876,37 @@ def test_audio():
     """
     logger.info("Testing audio output...")
 
+    if alsaaudio:
+        # Opening the device and playing 100 ms of silence is enough to
+        # know ALSA works, without speaker-test's seconds of test sound
+        sample_rate = _voice_sample_rate()
+        try:
+            pcm = alsaaudio.PCM(
+                alsaaudio.PCM_PLAYBACK,
+                rate=sample_rate,
+                channels=1,
+                format=alsaaudio.PCM_FORMAT_S16_LE
+            )
+            try:
+                pcm.write(bytes(sample_rate * 2 // 10))
+            finally:
+                pcm.close()
+            logger.info("✅ Audio output working")
+            return True
+        except alsaaudio.ALSAAudioError as e:
+            logger.error("❌ Audio output test failed: %s", e)
+            return False
+
     try:
-        # Simple speaker test using aplay
+        # Simple speaker test (without pyalsaaudio)
+        # Only stderr is kept (for the error message); speaker-test's
+        # progress output is thrown away rather than buffered
         result = subprocess.run(
-            ["speaker-test", "-t", "wav", "-c", "2", "-l", "1"],
-            capture_output=True,
-            timeout=5
+            [SPEAKER_TEST, "-t", "wav", "-c", "2", "-l", "1"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=5,
+            **_SPAWN_ARGS
         )
 
         if result.returncode == 0:
@@ -148,6 +914,8 @@ def test_audio():
             return True
         else:
             logger.error("❌ Audio output test failed")
+            if result.stderr:
+                logger.error("Error output: %s", result.stderr.decode("utf-8", "replace").strip())
             return False
 
     except subprocess.TimeoutExpired:
@@ -158,7 +926,7 @@ def test_audio():
         logger.info("Try: sudo apt install alsa-utils")
         return False
     except Exception as e:
-        logger.error(f"Error testing audio: {e}")
+        logger.error("Error testing audio: %s", e)
         return False
 
 
@@ -182,11 +950,12 @@ if __name__ == "__main__":
 
     # Test 3: Speak asynchronously
     print("Test 3: Testing asynchronous speech...")
-    process = speak_async("This is an asynchronous speech test.")
-    if process:
-        print(f"✅ Async speech started (PID: {process.pid})")
+    done = speak_async("This is an asynchronous speech test.")
+    if done:
+        print("✅ Async speech started")
         print("Waiting for speech to complete...")
-        process.wait()
+        done.wait()
+        _get_daemon().wait_played()
         print("✅ Async speech completed")
     else:
         print("❌ Async speech test failed")